@@ -0,0 +1 @@
+"""Code shared by the Sirienergy microservices (mounted at /app/common)."""
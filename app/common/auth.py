@@ -0,0 +1,190 @@
+"""User cookie authentication shared by the Sirienergy microservices.
+
+user_ms signs the user profile into the user_data cookie; the other services
+only verify and read it. load_user_profile keeps the verified profiles in a
+bounded LRU keyed by the raw cookie string, so the HMAC check, base64 and
+JSON decoding run once per cookie and process instead of on every request.
+
+For service-to-service calls the caller can forward the already verified
+profile in the X-Sirienergy-Identity header (see identity_headers), signed
+with INTERNAL_IDENTITY_KEY; downstream services accept it in place of the
+cookie. The header is disabled when INTERNAL_IDENTITY_KEY is unset, and the
+nginx proxy strips it from external requests.
+"""
+
+import os
+import hmac
+import json
+import base64
+import hashlib
+from functools import lru_cache
+from typing import Optional
+
+from itsdangerous import BadSignature, URLSafeSerializer
+
+SECRET_KEY = os.getenv("SECRET_KEY", "default_secret_key")
+COOKIE_NAME = "user_data"
+COOKIE_CACHE_SIZE = int(os.getenv("COOKIE_CACHE_SIZE", 4096))
+INTERNAL_IDENTITY_KEY = os.getenv("INTERNAL_IDENTITY_KEY", "")
+IDENTITY_HEADER = "X-Sirienergy-Identity"
+
+# Same serializer as user_ms
+serializer = URLSafeSerializer(SECRET_KEY, salt="user-cookie")
+
+
+def _optional_float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+class UserProfile:
+    """Immutable user profile read from the user_data cookie.
+
+    Instances are shared between requests through the cookie cache, so
+    attributes cannot be modified after creation.
+    """
+
+    __slots__ = (
+        "email", "country", "latitude", "longitude", "altitude", "time_zone",
+        "surface", "efficiency", "battery", "battery_energy_capacity",
+        "fee_type", "value",
+    )
+
+    def __init__(self, email: str, country: Optional[str] = None,
+                 latitude: Optional[float] = None, longitude: Optional[float] = None,
+                 altitude: Optional[float] = None, time_zone: Optional[str] = None,
+                 surface: Optional[float] = None, efficiency: Optional[float] = None,
+                 battery: bool = False, battery_energy_capacity: Optional[float] = None,
+                 fee_type: Optional[str] = None, value: Optional[float] = None):
+        set_attr = object.__setattr__
+        set_attr(self, "email", email)
+        set_attr(self, "country", country)
+        set_attr(self, "latitude", _optional_float(latitude))
+        set_attr(self, "longitude", _optional_float(longitude))
+        set_attr(self, "altitude", _optional_float(altitude))
+        set_attr(self, "time_zone", time_zone)
+        set_attr(self, "surface", _optional_float(surface))
+        set_attr(self, "efficiency", _optional_float(efficiency))
+        set_attr(self, "battery", bool(battery))
+        set_attr(self, "battery_energy_capacity", _optional_float(battery_energy_capacity))
+        set_attr(self, "fee_type", fee_type)
+        set_attr(self, "value", _optional_float(value))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UserProfile is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("UserProfile is immutable")
+
+    def __repr__(self):
+        return f"UserProfile(email={self.email!r}, country={self.country!r})"
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UserProfile":
+        """Build a profile from a decoded cookie payload.
+
+        Raises:
+            ValueError: If the email is missing or a numeric field is not a number.
+        """
+        if not data.get("email"):
+            raise ValueError("Missing email in cookie")
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@lru_cache(maxsize=COOKIE_CACHE_SIZE)
+def load_user_profile(cookie: str) -> UserProfile:
+    """Verify a user_data cookie and return its profile.
+
+    Only valid cookies are cached; invalid ones are checked again each time.
+
+    Args:
+        cookie (str): Raw cookie value.
+
+    Returns:
+        UserProfile: The (shared, immutable) profile.
+
+    Raises:
+        ValueError: If the signature is invalid or the payload is malformed.
+    """
+    try:
+        data = serializer.loads(cookie)
+    except BadSignature as e:
+        raise ValueError(f"Invalid cookie: {str(e)}")
+    if not isinstance(data, dict):
+        raise ValueError("Invalid cookie: payload is not an object")
+    try:
+        return UserProfile.from_dict(data)
+    except TypeError as e:
+        raise ValueError(f"Invalid cookie: {str(e)}")
+
+
+def _sign_identity(payload: bytes) -> str:
+    digest = hmac.new(INTERNAL_IDENTITY_KEY.encode(), payload, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+@lru_cache(maxsize=COOKIE_CACHE_SIZE)
+def encode_identity(profile: UserProfile) -> str:
+    """Serialize a verified profile into an X-Sirienergy-Identity value.
+
+    The value is "<base64url JSON>.<base64url HMAC-SHA256>"; profiles are
+    shared through the cookie cache, so each one is encoded only once.
+    """
+    payload = base64.urlsafe_b64encode(
+        json.dumps(profile.to_dict(), separators=(",", ":")).encode()
+    ).rstrip(b"=")
+    return f"{payload.decode()}.{_sign_identity(payload)}"
+
+
+@lru_cache(maxsize=COOKIE_CACHE_SIZE)
+def load_identity(value: str) -> UserProfile:
+    """Verify an X-Sirienergy-Identity value and return its profile.
+
+    Raises:
+        ValueError: If the header is malformed or its signature is invalid.
+    """
+    payload, _, signature = value.partition(".")
+    if not hmac.compare_digest(signature, _sign_identity(payload.encode())):
+        raise ValueError("Invalid identity header")
+    try:
+        data = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return UserProfile.from_dict(data)
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid identity header: {str(e)}")
+
+
+def get_user_profile(req) -> Optional[UserProfile]:
+    """Return the profile of the request's user, or None if unauthenticated.
+
+    A valid internal identity header (when enabled) takes precedence over
+    the user_data cookie.
+
+    Raises:
+        ValueError: If the identity header or the cookie is present but invalid.
+    """
+    if INTERNAL_IDENTITY_KEY:
+        identity = req.headers.get(IDENTITY_HEADER)
+        if identity:
+            return load_identity(identity)
+    cookie = req.cookies.get(COOKIE_NAME)
+    if not cookie:
+        return None
+    return load_user_profile(cookie)
+
+
+def identity_headers(req) -> dict:
+    """Headers that forward the request's verified user to another service.
+
+    Returns an empty dict when the identity header is disabled or the
+    request is not authenticated; forward the cookies as well so that
+    downstream services without the key keep working.
+    """
+    if not INTERNAL_IDENTITY_KEY:
+        return {}
+    try:
+        profile = get_user_profile(req)
+    except ValueError:
+        return {}
+    return {IDENTITY_HEADER: encode_identity(profile)} if profile else {}
@@ -0,0 +1,37 @@
+"""Gunicorn settings shared by the Sirienergy microservices.
+
+Every service image runs `gunicorn -c common/gunicorn.conf.py app:app` and
+sets PORT; the rest is tuned per service through the environment (see
+docker-compose.yml). docker-compose.dev.yml switches back to the Flask
+development server.
+"""
+
+import os
+import multiprocessing
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("GUNICORN_WORKERS", min(2 * multiprocessing.cpu_count() + 1, 8)))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+# "gthread" (default with threads), "sync" or "gevent" for I/O-bound services
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread" if threads > 1 else "sync")
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 0))
+# Import the app (pandas, pvlib, the solar index...) once in the master and
+# share those pages copy-on-write with the forked workers
+preload_app = _env_bool("GUNICORN_PRELOAD", "true")
+accesslog = os.getenv("GUNICORN_ACCESSLOG")  # e.g. "-" for stdout; unset disables it
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+if worker_class == "gevent":
+    # Patch before preload imports the app and its requests/redis clients
+    from gevent import monkey
+
+    monkey.patch_all()
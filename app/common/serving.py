@@ -0,0 +1,34 @@
+"""Serving mode shared by the Sirienergy microservices.
+
+ASYNC_MODE=gevent serves the Flask app with gevent's WSGI server instead of
+the development server. Each request runs in a greenlet and, with the
+standard library monkey-patched, blocking socket I/O (requests to other
+services and external APIs, Redis) yields to other requests instead of
+holding a thread, so a single worker keeps hundreds of upstream calls in
+flight. CPU-bound work (pvlib, pandas) still runs one request at a time.
+
+Patching has to happen before requests, redis or ssl are imported, so the
+services import this module before anything else.
+"""
+
+import os
+
+ASYNC_MODE = os.getenv("ASYNC_MODE", "")  # "" (development server) or "gevent"
+ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", 1000))
+
+if ASYNC_MODE == "gevent":
+    from gevent import monkey
+
+    monkey.patch_all()
+
+
+def serve(app, port: int) -> None:
+    """Run a Flask app on 0.0.0.0:port in the configured serving mode."""
+    if ASYNC_MODE == "gevent":
+        from gevent.pool import Pool
+        from gevent.pywsgi import WSGIServer
+
+        app.logger.info("Serving on port %d with gevent (%d connections)", port, ASYNC_MAX_CONNECTIONS)
+        WSGIServer(("0.0.0.0", port), app, spawn=Pool(ASYNC_MAX_CONNECTIONS)).serve_forever()
+    else:
+        app.run(debug=True, host="0.0.0.0", port=port)
@@ -0,0 +1,181 @@
+"""Request coalescing (single-flight) for Redis-cached upstream calls.
+
+When a cached key expires, every concurrent request misses at the same time.
+SingleFlight lets only one of them call the upstream API per key:
+
+- within a process, the first caller becomes the leader and the others wait
+  for its result (or are served the stale copy right away);
+- across workers and containers, the leader also takes a Redis SET NX lock,
+  and callers that lose the lock serve the stale copy or poll the cache.
+
+Every value is stored twice: under the key with the normal TTL, and under
+stale:{key} for CACHE_STALE_TTL_SECONDS longer, which is what gets served
+while a refresh is in flight or when the upstream call fails.
+"""
+
+import json
+import time
+import uuid
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+# Deletes the lock only if we still own it (it may have expired and been
+# taken by another worker meanwhile)
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent cache misses into a single upstream fetch per key.
+
+    Args:
+        redis_client: Redis client with decode_responses=True, or None to only
+            coalesce within the process.
+        stale_ttl (int): Seconds a value is kept as stale copy after its TTL.
+        lock_ttl (int): Seconds after which a Redis lock held by a crashed
+            worker expires.
+        wait_timeout (float): Seconds to wait for another fetch before
+            fetching anyway.
+        poll_interval (float): Seconds between cache polls while another
+            worker holds the lock.
+    """
+
+    def __init__(self, redis_client, stale_ttl: int = 86400, lock_ttl: int = 30,
+                 wait_timeout: float = 10, poll_interval: float = 0.05):
+        self.redis = redis_client
+        self.stale_ttl = stale_ttl
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._release_lock = redis_client.register_script(RELEASE_LOCK_LUA) if redis_client else None
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+
+    def _read(self, key: str):
+        """Return (fresh, stale) decoded values for key; None when missing."""
+        if not self.redis:
+            return None, None
+        try:
+            fresh, stale = self.redis.mget([key, f"stale:{key}"])
+            return (
+                json.loads(fresh) if fresh is not None else None,
+                json.loads(stale) if stale is not None else None,
+            )
+        except Exception as e:
+            logging.warning("Redis GET failed for %s: %s", key, e)
+            return None, None
+
+    def _store(self, key: str, ttl: int, value) -> None:
+        if not self.redis:
+            return
+        try:
+            payload = json.dumps(value)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(key, payload, ex=ttl)
+            pipe.set(f"stale:{key}", payload, ex=ttl + self.stale_ttl)
+            pipe.execute()
+            logging.debug("Cached %s (ttl %ds)", key, ttl)
+        except Exception as e:
+            logging.warning("Redis SET failed for %s: %s", key, e)
+
+    def _fetch(self, key: str, ttl: int, fetch: Callable[[], Any], stale):
+        """Leader path: take the cross-worker lock, fetch and store."""
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        locked = False
+        if self.redis:
+            try:
+                locked = bool(self.redis.set(lock_key, token, nx=True, ex=self.lock_ttl))
+            except Exception as e:
+                logging.warning("Redis lock failed for %s: %s", key, e)
+                locked = None
+            if locked is False:
+                if stale is not None:
+                    logging.debug("Refresh of %s in progress elsewhere, serving stale value", key)
+                    return stale
+                deadline = time.monotonic() + self.wait_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(self.poll_interval)
+                    fresh, _ = self._read(key)
+                    if fresh is not None:
+                        return fresh
+                logging.warning("Timed out waiting for %s, fetching it directly", key)
+
+        try:
+            value = fetch()
+            if value is None:
+                return stale
+            self._store(key, ttl, value)
+            return value
+        except Exception:
+            if stale is not None:
+                logging.exception("Fetch failed for %s, serving stale value", key)
+                return stale
+            raise
+        finally:
+            if locked:
+                try:
+                    self._release_lock(keys=[lock_key], args=[token])
+                except Exception as e:
+                    logging.warning("Redis unlock failed for %s: %s", key, e)
+
+    def get(self, key: str, ttl: int, fetch: Callable[[], Any]) -> Optional[Any]:
+        """Return the cached value of key, fetching it at most once at a time.
+
+        Args:
+            key (str): Cache key.
+            ttl (int): Seconds the fetched value is fresh.
+            fetch: Callable returning a JSON-serializable value, or None on
+                failure (not cached).
+
+        Returns:
+            The fresh, freshly fetched or stale value; None if the fetch
+            returned None and there is no stale copy.
+
+        Raises:
+            Exception: What the fetch raised when there is no stale copy,
+                also in the callers that waited for it.
+        """
+        fresh, stale = self._read(key)
+        if fresh is not None:
+            return fresh
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if stale is not None:
+                return stale
+            if flight.done.wait(self.wait_timeout):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+            return fetch()
+
+        try:
+            flight.value = self._fetch(key, ttl, fetch, stale)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
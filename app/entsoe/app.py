@@ -1,18 +1,30 @@
+# Must be imported first: applies gevent monkey patching when ASYNC_MODE=gevent
+from common.serving import serve
+
 import os
+import uuid
 import logging
+import threading
 
+import click
+import numpy as np
 from flask import Flask, request, jsonify
-from itsdangerous import URLSafeSerializer
 
-from datetime import datetime, timedelta
-from typing import List, Dict, Union, Optional
+from array import array
+from functools import lru_cache
+from types import MappingProxyType
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Dict, NamedTuple, Tuple, Optional
+from xml.etree import ElementTree
 import requests
-import xmltodict
 import csv
 import json
 
 import redis
 
+from common.auth import get_user_profile
+from common.singleflight import RELEASE_LOCK_LUA
+
 app = Flask(__name__)
 
 logging.basicConfig(level=logging.DEBUG)
@@ -23,165 +35,661 @@ app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "default_secret_key")
 REDIS_HOST = os.getenv("REDIS_HOST", "entsoe_redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
-CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", 3600))  # 1 hour
 
-# Initialize serializer (same as user_ms)
-serializer = URLSafeSerializer(app.config["SECRET_KEY"], salt="user-cookie")
+# Background refresh of the day-ahead prices of every country. Prices are
+# published once a day (~12:45 CET); the query window rolls over at midnight
+# and reaches the next delivery day once PUBLICATION_TIME has passed.
+REFRESH_ENABLED = os.getenv("ENTSOE_REFRESH_ENABLED", "true").lower() in ("1", "true", "yes")
+REFRESH_TIMES = [t.strip() for t in os.getenv("ENTSOE_REFRESH_TIMES", "00:05,13:30").split(",") if t.strip()]
+PUBLICATION_TIME = datetime.strptime(os.getenv("ENTSOE_PUBLICATION_TIME", "13:00"), "%H:%M").time()
+REFRESH_RETRY_SECONDS = int(os.getenv("ENTSOE_REFRESH_RETRY_SECONDS", 300))
+REFRESH_LOCK_TTL_SECONDS = int(os.getenv("ENTSOE_REFRESH_LOCK_TTL_SECONDS", 900))
+
+# Price history: one array of 96 quarter-hour float32 prices per country and UTC day
+PRICE_HISTORY_MAX_DAYS = int(os.getenv("PRICE_HISTORY_MAX_DAYS", 366))
+PRICE_SLOT_MINUTES = 15
+PRICE_SLOTS_PER_DAY = 24 * 60 // PRICE_SLOT_MINUTES
+PRICE_DTYPE = np.dtype("<f4")
+# Resolutions ENTSO-E publishes day-ahead prices in, and that prices can be resampled to
+RESOLUTION_MINUTES = {"PT15M": 15, "PT30M": 30, "PT60M": 60}
+EMPTY_PRICE_DAY = np.full(PRICE_SLOTS_PER_DAY, np.nan, dtype=PRICE_DTYPE).tobytes()
 
 try:
     redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
     redis_client.ping()
+    # Price history arrays are raw bytes
+    redis_raw_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=False)
     logging.info("Connected to Redis cache at %s:%d", REDIS_HOST, REDIS_PORT)
 except Exception as e:
     logging.warning("Redis cache unavailable (%s:%d): %s", REDIS_HOST, REDIS_PORT, e)
     redis_client = None
+    redis_raw_client = None
+
+release_lock = redis_client.register_script(RELEASE_LOCK_LUA) if redis_client else None
+
+# Latest prices per country when Redis is unavailable
+_latest_prices: Dict[str, dict] = {}
+refresh_requested = threading.Event()
+_refresher_pid = None
+_refresher_guard = threading.Lock()
 
-def load_entsoe_country_keys() -> Dict[str, str]:
-    """Loads country keys from a CSV file for ENTSO-E API queries.
+class Country(NamedTuple):
+    """One row of tables/entsoe_country_keys.csv."""
+    name: str
+    iso: str
+    key: str
+
+
+def load_entsoe_countries() -> Tuple[Country, ...]:
+    """Loads the countries and their ENTSO-E bidding zone keys from the CSV file.
 
     Returns:
-        Dict[str, str]: A dictionary mapping country names to their respective 
-            ENTSO-E keys.
+        Tuple[Country, ...]: The countries, in file order.
     """
     base_dir = os.path.dirname(__file__)
     file_path = os.path.abspath(
         os.path.join(base_dir, "tables/entsoe_country_keys.csv")
     )
 
-    entsoe_country_keys: Dict[str, str] = {}
     with open(file_path, mode="r", encoding="utf-8") as file:
         reader = csv.DictReader(file)
-        for row in reader:
-            entsoe_country_keys[row["country"]] = row["key"]
-    return entsoe_country_keys
+        return tuple(Country(row["country"], row["iso"], row["key"]) for row in reader)
 
 
-def get_day_ahead_prices(
-    country_name: str,
-) -> Optional[List[Dict[str, Union[str, float]]]]:
-    """Retrieves day-ahead electricity prices for a specified country.
+# Loaded once at import; the index maps the case-insensitive name and ISO
+# 3166-1 alpha-2 code of every country to its row
+ENTSOE_COUNTRIES = load_entsoe_countries()
+COUNTRY_INDEX = MappingProxyType({
+    alias.casefold(): country
+    for country in ENTSOE_COUNTRIES
+    for alias in (country.name, country.iso)
+})
+
 
-    This function uses the dedicated Redis cache (TTL configurable) keyed by
-    country + period window to reduce ENTSO-E API calls.
+@lru_cache(maxsize=1024)
+def lookup_country(name: str) -> Optional[Country]:
+    """Resolves a country name or ISO code (any case); None if unknown.
+
+    Results, including misses, are cached so repeated bad input costs a
+    single dict lookup.
     """
-    endpoint = "https://web-api.tp.entsoe.eu/api"
-    current_datetime = datetime.now()
-    yesterday_datetime = current_datetime - timedelta(days=1)
-    current_formatted = current_datetime.strftime("%Y%m%d") + "2200"
-    yesterday_formatted = yesterday_datetime.strftime("%Y%m%d") + "2200"
+    return COUNTRY_INDEX.get(name.strip().casefold()) if name else None
 
-    # cache key includes country + period window
-    cache_key = f"entsoe:{country_name}:{yesterday_formatted}:{current_formatted}"
 
-    # Try cache
-    if redis_client:
-        try:
-            cached = redis_client.get(cache_key)
-            if cached:
-                logging.debug("ENTSO-E cache hit for key %s", cache_key)
-                return json.loads(cached)
-        except Exception as e:
-            logging.warning("Redis GET failed: %s", e)
+def price_window(now: Optional[datetime] = None) -> Tuple[str, str]:
+    """Returns the ENTSO-E (periodStart, periodEnd) of the published prices.
+
+    The window starts with today's delivery day and, from PUBLICATION_TIME
+    on, also covers tomorrow's.
+    """
+    now = now or datetime.now()
+    yesterday = now - timedelta(days=1)
+    last_day = now + timedelta(days=1) if now.time() >= PUBLICATION_TIME else now
+    return yesterday.strftime("%Y%m%d") + "2200", last_day.strftime("%Y%m%d") + "2200"
+
 
-    entsoe_country_keys = load_entsoe_country_keys()
-    if country_name not in entsoe_country_keys:
-        logging.error("Key for country %s not found", country_name)
+class PriceSeries(NamedTuple):
+    """Points of one ENTSO-E price Period, as typed arrays."""
+    start: str
+    end: str
+    resolution: str
+    positions: array  # array("i")
+    prices: array  # array("d")
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_price_series(
+    source,
+    resolution: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Optional[List[PriceSeries]]:
+    """Extracts the price Periods from an A44 document.
+
+    Parses incrementally with iterparse: only the position and price of the
+    wanted Periods' points are kept, every TimeSeries is discarded from the
+    tree as soon as it is read, and parsing stops once `limit` Periods are
+    complete.
+
+    Args:
+        source: File-like object (or path) with the Publication_MarketDocument XML.
+        resolution (str, optional): ISO 8601 resolution of the wanted
+            Periods; all resolutions if omitted.
+        limit (int, optional): Stop after this many Periods.
+
+    Returns:
+        List of PriceSeries in document order (empty if no Period matches),
+        or None if the document is not a Publication_MarketDocument (e.g.
+        an Acknowledgement_MarketDocument reporting no data).
+    """
+    found = []
+    period_start = period_end = period_resolution = None
+    position = price = None
+    positions, prices = array("i"), array("d")
+    in_interval = False
+
+    events = ElementTree.iterparse(source, events=("start", "end"))
+    _, root = next(events)
+    if _local_name(root.tag) != "Publication_MarketDocument":
+        logging.info("ENTSO-E returned %s instead of prices", _local_name(root.tag))
         return None
 
-    country_key = entsoe_country_keys[country_name]
+    for event, elem in events:
+        tag = _local_name(elem.tag)
+        if event == "start":
+            if tag == "Period":
+                period_start = period_end = period_resolution = None
+                positions, prices = array("i"), array("d")
+            elif tag == "timeInterval":
+                in_interval = True
+            continue
+
+        if tag == "TimeSeries":
+            # Every series is done with once read: detach it so that the
+            # tree never holds more than the series being parsed
+            elem.clear()
+            root.clear()
+        elif tag == "timeInterval":
+            in_interval = False
+        elif tag == "start" and in_interval:
+            period_start = elem.text
+        elif tag == "end" and in_interval:
+            period_end = elem.text
+        elif tag == "resolution":
+            period_resolution = elem.text
+        elif resolution is not None and period_resolution != resolution:
+            continue
+        elif tag == "position":
+            position = int(elem.text)
+        elif tag == "price.amount":
+            price = float(elem.text)
+        elif tag == "Point":
+            positions.append(position)
+            prices.append(price)
+            elem.clear()
+        elif tag == "Period":
+            found.append(PriceSeries(period_start, period_end, period_resolution, positions, prices))
+            elem.clear()
+            if limit is not None and len(found) >= limit:
+                break
+
+    return found
+
+
+def fetch_price_series(country_key: str, period_start: str, period_end: str) -> Optional[List[PriceSeries]]:
+    """Requests the day-ahead price Periods of a bidding zone from ENTSO-E.
+
+    The response body is streamed into parse_price_series, so the document
+    is never held in memory as a whole.
+
+    Args:
+        country_key (str): ENTSO-E bidding zone key.
+        period_start (str): UTC start, yyyyMMddHHmm.
+        period_end (str): UTC end, yyyyMMddHHmm.
+
+    Returns:
+        The list of PriceSeries, or None if the request failed.
+    """
+    endpoint = "https://web-api.tp.entsoe.eu/api"
     params = {
         "securityToken": ENTSO_E_API_KEY,
         "documentType": "A44",
         "in_Domain": country_key,
         "out_Domain": country_key,
-        "periodStart": yesterday_formatted,
-        "periodEnd": current_formatted,
+        "periodStart": period_start,
+        "periodEnd": period_end,
+    }
+
+    with requests.get(endpoint, params=params, timeout=30, stream=True) as response:
+        if response.status_code != 200:
+            logging.error("Failed to retrieve data. Status code: %s, Response: %s", response.status_code, response.text)
+            return None
+        response.raw.decode_content = True
+        series = parse_price_series(response.raw)
+
+    if series == []:
+        logging.info("No price series in ENTSO-E response for %s", country_key)
+    return series
+
+
+def _parse_utc(timestamp: str) -> datetime:
+    return datetime.strptime(timestamp, "%Y-%m-%dT%H:%MZ").replace(tzinfo=timezone.utc)
+
+
+def normalize_series(series: PriceSeries) -> Optional[Tuple[datetime, np.ndarray]]:
+    """Expands a Period into quarter-hour float32 prices from its UTC start.
+
+    ENTSO-E leaves out a Point whose price equals the previous one, so
+    missing positions (up to the end of the timeInterval) repeat the last
+    published price. Coarser resolutions are repeated over their quarter-hours.
+
+    Returns:
+        (start, prices), or None for an empty Period or unknown resolution.
+    """
+    minutes = RESOLUTION_MINUTES.get(series.resolution)
+    if minutes is None or not series.positions or not series.start:
+        if series.positions:
+            logging.warning("Skipping ENTSO-E Period with resolution %s", series.resolution)
+        return None
+    start = _parse_utc(series.start)
+    positions = np.frombuffer(series.positions, dtype=np.int32)
+    count = int(positions.max())
+    if series.end:
+        count = max(count, (_parse_utc(series.end) - start) // timedelta(minutes=minutes))
+
+    values = np.full(count, np.nan, dtype=PRICE_DTYPE)
+    values[positions - 1] = np.frombuffer(series.prices, dtype=np.float64)
+    last_known = np.where(np.isnan(values), 0, np.arange(count))
+    np.maximum.accumulate(last_known, out=last_known)
+    return start, np.repeat(values[last_known], minutes // PRICE_SLOT_MINUTES)
+
+
+def normalize_all(series_list: List[PriceSeries]) -> List[Tuple[datetime, np.ndarray]]:
+    """Normalizes Periods coarsest first, so finer prices win where they overlap."""
+    ordered = sorted(series_list, key=lambda series: -RESOLUTION_MINUTES.get(series.resolution, 0))
+    return [normalized for normalized in map(normalize_series, ordered) if normalized]
+
+
+def price_grid(series_list: List[PriceSeries], start: datetime, end: datetime) -> np.ndarray:
+    """Quarter-hour prices of [start, end) from the given Periods, NaN where none."""
+    step = timedelta(minutes=PRICE_SLOT_MINUTES)
+    grid = np.full((end - start) // step, np.nan, dtype=PRICE_DTYPE)
+    for series_start, values in normalize_all(series_list):
+        offset = (series_start - start) // step
+        first, last = max(offset, 0), min(offset + len(values), len(grid))
+        if first < last:
+            grid[first:last] = values[first - offset:last - offset]
+    return grid
+
+
+def resample_prices(values: np.ndarray, resolution: str) -> np.ndarray:
+    """Averages quarter-hour prices into `resolution` slots, ignoring NaN.
+
+    A slot is NaN only when all of its quarter-hours are.
+    """
+    factor = RESOLUTION_MINUTES[resolution] // PRICE_SLOT_MINUTES
+    if factor == 1:
+        return values
+    slots = values.reshape(-1, factor)
+    known = ~np.isnan(slots)
+    counts = known.sum(axis=1)
+    sums = np.where(known, slots, 0).sum(axis=1, dtype=PRICE_DTYPE)
+    return np.divide(sums, counts, out=np.full(len(slots), np.nan, dtype=PRICE_DTYPE), where=counts > 0)
+
+
+def price_values(values: np.ndarray) -> List[Optional[float]]:
+    """Float32 prices as JSON numbers (shortest repr), NaN as null."""
+    return [None if v == "nan" else float(v) for v in values.astype(str).tolist()]
+
+
+def _history_key(country_name: str, day: date) -> str:
+    return f"entsoe:history:{country_name}:{day.isoformat()}"
+
+
+def store_price_history(country_name: str, series_list: List[PriceSeries]) -> int:
+    """Writes price Periods into the per-country, per-UTC-day history arrays.
+
+    Each day is a string of PRICE_SLOTS_PER_DAY little-endian float32 prices
+    (NaN where unknown), created on first write; every normalized Period
+    becomes one SETRANGE per day it overlaps, all in a single transaction.
+
+    Returns:
+        Number of day arrays written.
+    """
+    if not redis_raw_client:
+        return 0
+    step = timedelta(minutes=PRICE_SLOT_MINUTES)
+    pipe = redis_raw_client.pipeline(transaction=True)
+    written = 0
+    for start, values in normalize_all(series_list):
+        first = (start - datetime.combine(start.date(), datetime.min.time(), timezone.utc)) // step
+        day = start.date()
+        while len(values):
+            chunk, values = values[:PRICE_SLOTS_PER_DAY - first], values[PRICE_SLOTS_PER_DAY - first:]
+            key = _history_key(country_name, day)
+            pipe.set(key, EMPTY_PRICE_DAY, nx=True)
+            pipe.setrange(key, first * PRICE_DTYPE.itemsize, chunk.tobytes())
+            written += 1
+            day, first = day + timedelta(days=1), 0
+    pipe.execute()
+    return written
+
+
+def read_price_history(country_names: List[str], start: date, end: date) -> Dict[str, np.ndarray]:
+    """Reads the quarter-hour prices of [start, end] (UTC days) in one MGET.
+
+    Returns:
+        Dict country name -> float32 array of (days * PRICE_SLOTS_PER_DAY)
+        prices from start 00:00 UTC, NaN where the store has no price.
+    """
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    keys = [_history_key(name, day) for name in country_names for day in days]
+    blobs = iter(redis_raw_client.mget(keys) if redis_raw_client else [None] * len(keys))
+    return {
+        name: np.concatenate([
+            np.frombuffer(next(blobs) or EMPTY_PRICE_DAY, dtype=PRICE_DTYPE) for _ in days
+        ])
+        for name in country_names
     }
 
-    response = requests.get(endpoint, params=params, timeout=30)
-    data_xml = response.text
-    data_dict = xmltodict.parse(data_xml)
-    data_json = json.loads(json.dumps(data_dict))
-
-    if response.status_code == 200:
-        time_series_list = data_json["Publication_MarketDocument"].get("TimeSeries", [])
-        points = []
-
-        if isinstance(time_series_list, list):
-            for time_series in time_series_list:
-                if time_series.get("Period", {}).get("resolution") == "PT15M":
-                    points = time_series["Period"].get("Point", [])
-                    break
-        elif time_series_list.get("Period", {}).get("resolution") == "PT15M":
-            points = time_series_list["Period"].get("Point", [])
-        else:
-            logging.info("Incorrect format: %s", time_series_list)
-
-        # cache result
+
+def read_latest_prices(country_name: str) -> Optional[dict]:
+    """Returns the last refreshed prices of a country (pure cache read)."""
+    if not redis_client:
+        return _latest_prices.get(country_name)
+    try:
+        cached = redis_client.get(f"entsoe:{country_name}:latest")
+        return json.loads(cached) if cached else None
+    except Exception as e:
+        logging.warning("Redis GET failed: %s", e)
+        return None
+
+
+def store_latest_prices(country_name: str, entry: dict) -> None:
+    _latest_prices[country_name] = entry
+    if redis_client:
+        try:
+            redis_client.set(f"entsoe:{country_name}:latest", json.dumps(entry))
+        except Exception as e:
+            logging.warning("Redis SET failed: %s", e)
+
+
+def _refresh_slots(day) -> List[datetime]:
+    return [datetime.combine(day, datetime.strptime(slot, "%H:%M").time()) for slot in REFRESH_TIMES]
+
+
+def last_scheduled_refresh(now: datetime) -> datetime:
+    """Returns the most recent REFRESH_TIMES slot at or before now."""
+    return max(
+        slot for day in (now.date() - timedelta(days=1), now.date())
+        for slot in _refresh_slots(day) if slot <= now
+    )
+
+
+def next_scheduled_refresh(now: datetime) -> datetime:
+    """Returns the first REFRESH_TIMES slot after now."""
+    return min(
+        slot for day in (now.date(), now.date() + timedelta(days=1))
+        for slot in _refresh_slots(day) if slot > now
+    )
+
+
+def refresh_prices() -> bool:
+    """Fetches the current prices of every country that is not up to date.
+
+    A country is up to date when its latest prices cover the whole current
+    window (see price_window) and were fetched after the last scheduled
+    refresh; prices stored before the next day's were published are
+    fetched again at the next retry. A Redis lock makes a
+    single worker refresh at a time; the previous prices are served until
+    the new ones are stored.
+
+    Returns:
+        True if every country is up to date (or another worker is refreshing).
+    """
+    token = uuid.uuid4().hex
+    if redis_client:
+        try:
+            if not redis_client.set("entsoe:refresh:lock", token, nx=True, ex=REFRESH_LOCK_TTL_SECONDS):
+                logging.debug("ENTSO-E refresh already running in another worker")
+                return True
+        except Exception as e:
+            logging.warning("Redis lock failed, refreshing anyway: %s", e)
+
+    try:
+        now = datetime.now()
+        period_start, period_end = price_window(now)
+        scheduled = last_scheduled_refresh(now).isoformat()
+        complete = True
+        for country_name, _, country_key in ENTSOE_COUNTRIES:
+            entry = read_latest_prices(country_name)
+            if (entry and "prices" in entry and entry["period_end"] == period_end
+                    and entry["fetched_at"] >= scheduled and entry["prices"][-1] is not None):
+                continue
+            try:
+                series = fetch_price_series(country_key, period_start, period_end)
+            except Exception as e:
+                logging.error("ENTSO-E refresh failed for %s: %s", country_name, e)
+                series = None
+            if series is None:
+                complete = False
+                continue
+            window_start = datetime.strptime(period_start, "%Y%m%d%H%M").replace(tzinfo=timezone.utc)
+            window_end = datetime.strptime(period_end, "%Y%m%d%H%M").replace(tzinfo=timezone.utc)
+            prices = price_grid(series, window_start, window_end)
+            store_price_history(country_name, series)
+            store_latest_prices(country_name, {
+                "period_start": period_start,
+                "period_end": period_end,
+                "fetched_at": datetime.now().isoformat(),
+                "start": window_start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "prices": price_values(prices)
+            })
+            logging.info("Refreshed ENTSO-E prices for %s (%d of %d slots)",
+                         country_name, np.count_nonzero(~np.isnan(prices)), len(prices))
+            if np.isnan(prices[-1]):
+                # The next day's prices are not published yet
+                complete = False
+        return complete
+    finally:
         if redis_client:
             try:
-                redis_client.set(cache_key, json.dumps(points), ex=CACHE_TTL_SECONDS)
-                logging.debug("Cached ENTSO-E response under key %s (ttl %ds)", cache_key, CACHE_TTL_SECONDS)
+                release_lock(keys=["entsoe:refresh:lock"], args=[token])
             except Exception as e:
-                logging.warning("Redis SET failed: %s", e)
+                logging.warning("Redis unlock failed: %s", e)
 
-        return points
-    else:
-        logging.error("Failed to retrieve data. Status code: %s, Response: %s", response.status_code, data_json)
-        return None
+
+def refresher_loop() -> None:
+    """Refreshes prices at every REFRESH_TIMES slot, retrying failures sooner."""
+    while True:
+        try:
+            complete = refresh_prices()
+        except Exception as e:
+            logging.error("ENTSO-E refresh failed: %s", e)
+            complete = False
+        now = datetime.now()
+        wait = (next_scheduled_refresh(now) - now).total_seconds() if complete else REFRESH_RETRY_SECONDS
+        refresh_requested.wait(timeout=wait)
+        refresh_requested.clear()
+
+
+def start_refresher() -> None:
+    """Starts the refresher thread once per process (also after a fork)."""
+    global _refresher_pid
+    if not REFRESH_ENABLED or _refresher_pid == os.getpid():
+        return
+    with _refresher_guard:
+        if _refresher_pid != os.getpid():
+            threading.Thread(target=refresher_loop, name="entsoe-refresher", daemon=True).start()
+            _refresher_pid = os.getpid()
+
+
+@app.before_request
+def ensure_refresher():
+    start_refresher()
+
+
+def get_day_ahead_prices(country_name: str) -> Optional[dict]:
+    """Retrieves day-ahead electricity prices for a specified country.
+
+    country_name must be the canonical name (see lookup_country). Pure
+    cache read: the prices are kept up to date by the background refresher,
+    and user requests never wait on ENTSO-E. When nothing is cached yet
+    (cold start) an immediate refresh is requested.
+
+    Returns:
+        Dict with period_start, period_end, fetched_at, start and the
+        quarter-hour prices (null where unpublished), or None.
+    """
+    entry = read_latest_prices(country_name)
+    if entry is None:
+        refresh_requested.set()
+    return entry
 
 
 def get_user_from_cookie(req):
     """Extract and validate user email and country from cookie."""
-    cookie = req.cookies.get("user_data")
-    if not cookie:
+    try:
+        profile = get_user_profile(req)
+    except ValueError as e:
+        return None, None, (jsonify({"error": str(e)}), 401)
+    if profile is None:
         return None, None, (jsonify({"error": "Authentication required"}), 401)
+    if not profile.country:
+        return None, None, (jsonify({"error": "Missing user data in cookie"}), 401)
+    return profile.email, profile.country, None
 
+
+def price_range(user_email: str, user_country: str, resolution: str):
+    """Answers a /entsoe/prices range query from the price history store."""
     try:
-        data = serializer.loads(cookie)
-        user_email = data.get("email")
-        country = data.get("country")
-        
-        if not user_email or not country:
-            return None, None, (jsonify({"error": "Missing user data in cookie"}), 401)
-        
-        return user_email, country, None
-    except Exception as e:
-        return None, None, (jsonify({"error": f"Invalid cookie: {str(e)}"}), 401)
+        start = date.fromisoformat(request.args["from"])
+        end = date.fromisoformat(request.args.get("to") or request.args["from"])
+    except ValueError:
+        return jsonify({"error": "from and to must be dates (YYYY-MM-DD)"}), 400
+    if end < start:
+        return jsonify({"error": "to must not be before from"}), 400
+    if (end - start).days >= PRICE_HISTORY_MAX_DAYS:
+        return jsonify({"error": f"Range is limited to {PRICE_HISTORY_MAX_DAYS} days"}), 400
+
+    names = [n.strip() for n in request.args.get("countries", user_country).split(",") if n.strip()]
+    countries = [lookup_country(name) for name in names]
+    unknown = [name for name, country in zip(names, countries) if country is None]
+    if unknown:
+        return jsonify({"error": f"No ENTSO-E bidding zone for: {', '.join(unknown)}"}), 400
+    country_names = list(dict.fromkeys(country.name for country in countries))
+
+    logging.info("Reading price history %s..%s of %s for user %s", start, end, country_names, user_email)
+    history = read_price_history(country_names, start, end)
+    return jsonify({
+        "user": user_email,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "start": f"{start.isoformat()}T00:00:00Z",
+        "resolution": resolution,
+        "countries": country_names,
+        "prices": {
+            name: price_values(resample_prices(values, resolution))
+            for name, values in history.items()
+        },
+    }), 200
 
 
 @app.route('/entsoe/prices', methods=['GET'])
 def entsoe_prices():
     """Retrieves day-ahead electricity prices for the authenticated user's country.
 
-    Gets country from user_data cookie.
+    Gets country from user_data cookie. Prices are one array per country
+    from `start` (UTC), averaged to the `resolution` query parameter
+    (PT15M by default, PT30M or PT60M). With a `from` query parameter the
+    prices are read from the history store instead:
+
+    - from, to: First and last UTC day (YYYY-MM-DD, `to` defaults to `from`).
+    - countries: Comma-separated names or ISO codes (default: the user's country).
 
     Returns:
         JSON response with prices data or error message:
+        - 400 if the resolution or range query is invalid
         - 401 if cookie is missing/invalid
-        - 500 if API request fails
-        - 200 with prices data on success
+        - 404 if the country has no ENTSO-E bidding zone
+        - 503 if the prices have not been retrieved yet
+        - 200 with the latest refreshed prices on success, or with one
+          quarter-hour array per country from `start` for range queries
+          (null where the store has no price)
     """
     user_email, country, err = get_user_from_cookie(request)
     if err:
         return err
 
+    resolution = request.args.get("resolution", "PT15M").upper()
+    if resolution not in RESOLUTION_MINUTES:
+        return jsonify({"error": f"resolution must be one of {', '.join(RESOLUTION_MINUTES)}"}), 400
+
+    if "from" in request.args:
+        return price_range(user_email, country, resolution)
+
+    entsoe_country = lookup_country(country)
+    if entsoe_country is None:
+        logging.error("Key for country %s not found", country)
+        return jsonify({"error": f"No ENTSO-E bidding zone for country {country}"}), 404
+
     try:
         logging.info("Retrieving ENTSO-E prices for user %s in country %s", user_email, country)
-        prices = get_day_ahead_prices(country)
+        prices = get_day_ahead_prices(entsoe_country.name)
         
         if prices is None:
-            return jsonify({"error": "Failed to retrieve prices from ENTSO-E API"}), 500
+            return jsonify({"error": "Prices are being retrieved, retry shortly"}), 503, {"Retry-After": "30"}
         
         return jsonify({
             "user": user_email,
-            "country": country,
-            "data": prices
+            "country": entsoe_country.name,
+            "period_start": prices["period_start"],
+            "period_end": prices["period_end"],
+            "fetched_at": prices["fetched_at"],
+            "start": prices["start"],
+            "resolution": resolution,
+            "prices": price_values(resample_prices(np.array(prices["prices"], dtype=PRICE_DTYPE), resolution))
         }), 200
     except Exception as error:
         logging.error("Error retrieving ENTSO-E prices: %s", str(error))
         return jsonify({"error": str(error)}), 500
 
 
+@app.route('/entsoe/countries', methods=['GET'])
+def entsoe_countries():
+    """Lists the countries with day-ahead prices and their bidding zones.
+
+    Returns:
+        JSON response with the name, ISO code and ENTSO-E key of each country.
+    """
+    return jsonify({
+        "countries": [
+            {"name": country.name, "iso": country.iso, "key": country.key}
+            for country in ENTSOE_COUNTRIES
+        ]
+    }), 200
+
+
+@app.cli.command("backfill-prices")
+@click.option("--from", "start", required=True, help="First UTC day (YYYY-MM-DD).")
+@click.option("--to", "end", default=None, help="Last UTC day (YYYY-MM-DD), defaults to today.")
+@click.option("--countries", default="", help="Comma-separated names or ISO codes, defaults to all.")
+@click.option("--chunk-days", default=31, type=click.IntRange(min=1), show_default=True,
+              help="Days requested from ENTSO-E at once.")
+def backfill_prices(start, end, countries, chunk_days):
+    """Fills the price history store from ENTSO-E for a range of days."""
+    first = date.fromisoformat(start)
+    last = date.fromisoformat(end) if end else datetime.now(timezone.utc).date()
+    if countries:
+        selected = [lookup_country(name.strip()) for name in countries.split(",") if name.strip()]
+        if None in selected:
+            raise click.BadParameter("unknown country", param_hint="--countries")
+    else:
+        selected = ENTSOE_COUNTRIES
+
+    for country in selected:
+        written = 0
+        chunk_start = first
+        while chunk_start <= last:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), last)
+            try:
+                series = fetch_price_series(
+                    country.key,
+                    chunk_start.strftime("%Y%m%d0000"),
+                    (chunk_end + timedelta(days=1)).strftime("%Y%m%d0000"),
+                )
+            except Exception as e:
+                logging.error("ENTSO-E backfill failed for %s: %s", country.name, e)
+                series = None
+            if series is None:
+                click.echo(f"{country.name}: {chunk_start}..{chunk_end} failed")
+            else:
+                written += store_price_history(country.name, series)
+            chunk_start = chunk_end + timedelta(days=1)
+        click.echo(f"{country.name}: {written} day arrays written")
+
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5004)
\ No newline at end of file
+    serve(app, port=5004)
\ No newline at end of file
@@ -1,12 +1,16 @@
+# Must be imported first: applies gevent monkey patching when ASYNC_MODE=gevent
+from common.serving import serve
+
 import os
 import logging
 import requests
 import json
 
 from flask import Flask, request, jsonify
-from itsdangerous import URLSafeSerializer
 from datetime import datetime, timezone
 
+from common.auth import get_user_profile, identity_headers
+
 app = Flask(__name__)
 
 logging.basicConfig(level=logging.DEBUG)
@@ -15,26 +19,16 @@ logging.basicConfig(level=logging.DEBUG)
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "default_secret_key")
 PROCESSING_SERVICE_URL = os.getenv("PROCESSING_SERVICE_URL", "http://processing:5005")
 
-# Initialize serializer (same as user_ms)
-serializer = URLSafeSerializer(app.config["SECRET_KEY"], salt="user-cookie")
-
 
 def get_user_from_cookie(req):
     """Extract and validate user email from cookie."""
-    cookie = req.cookies.get("user_data")
-    if not cookie:
-        return None, (jsonify({"error": "Authentication required"}), 401)
-
     try:
-        data = serializer.loads(cookie)
-        user_email = data.get("email")
-        
-        if not user_email:
-            return None, (jsonify({"error": "Missing email in cookie"}), 401)
-        
-        return user_email, None
-    except Exception as e:
-        return None, (jsonify({"error": f"Invalid cookie: {str(e)}"}), 401)
+        profile = get_user_profile(req)
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 401)
+    if profile is None:
+        return None, (jsonify({"error": "Authentication required"}), 401)
+    return profile.email, None
 
 
 def _current_day_iso():
@@ -100,6 +94,7 @@ def get_consumption_peaks():
             f"{PROCESSING_SERVICE_URL}/processing/surplus",
             json={"day": day},
             cookies=request.cookies,
+            headers=identity_headers(request),
             timeout=10
         )
         
@@ -160,4 +155,4 @@ def get_consumption_peaks():
 
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5006)
\ No newline at end of file
+    serve(app, port=5006)
\ No newline at end of file
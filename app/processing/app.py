@@ -1,13 +1,30 @@
+# Must be imported first: applies gevent monkey patching when ASYNC_MODE=gevent
+from common.serving import serve
+
 import os
+import json
+import shutil
 import logging
+import warnings
 import requests
 
-from flask import Flask, request, jsonify
-from itsdangerous import URLSafeSerializer
+import click
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+from flask import Flask, Response, request, jsonify, stream_with_context
 
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 import pvlib
-from datetime import datetime
+from datetime import date, timedelta
+
+import redis
+
+from common.auth import get_user_profile, identity_headers
 
 app = Flask(__name__)
 
@@ -16,9 +33,489 @@ logging.basicConfig(level=logging.DEBUG)
 # Configuration
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "default_secret_key")
 REGISTER_SERVICE_URL = os.getenv("REGISTER_SERVICE_URL", "http://register:5003")
+ENTSOE_SERVICE_URL = os.getenv("ENTSOE_SERVICE_URL", "http://entsoe:5004")
+
+# Upstream HTTP: one keep-alive connection pool and fan-out executor per worker
+UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", 20))
+UPSTREAM_MAX_WORKERS = int(os.getenv("UPSTREAM_MAX_WORKERS", 20))
+UPSTREAM_TIMEOUT_SECONDS = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", 10))
+
+# Clear-sky profile cache: a bounded per-process LRU, optionally backed by a
+# shared Redis tier so that all workers/containers reuse each other's results.
+CLEARSKY_CACHE_SIZE = int(os.getenv("CLEARSKY_CACHE_SIZE", 1024))
+CLEARSKY_REDIS_HOST = os.getenv("CLEARSKY_REDIS_HOST")
+CLEARSKY_REDIS_PORT = int(os.getenv("CLEARSKY_REDIS_PORT", 6379))
+CLEARSKY_REDIS_DB = int(os.getenv("CLEARSKY_REDIS_DB", 0))
+CLEARSKY_CACHE_TTL_SECONDS = int(os.getenv("CLEARSKY_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+PVGEN_BATCH_MAX_SITES = int(os.getenv("PVGEN_BATCH_MAX_SITES", 5000))
+
+# Generation horizon: plain JSON for short ranges, chunked NDJSON beyond that
+PVGEN_DEFAULT_FREQ = os.getenv("PVGEN_DEFAULT_FREQ", "15min")
+PVGEN_CHUNK_DAYS = int(os.getenv("PVGEN_CHUNK_DAYS", 7))
+PVGEN_MAX_JSON_DAYS = int(os.getenv("PVGEN_MAX_JSON_DAYS", 31))
+PVGEN_MAX_DAYS = int(os.getenv("PVGEN_MAX_DAYS", 3660))
+
+# Precomputed annual solar-geometry index (see the build-solar-index command)
+SOLAR_INDEX_DIR = os.getenv("SOLAR_INDEX_DIR", os.path.join(os.path.dirname(__file__), "solar_index"))
+SOLAR_INDEX_INTERPOLATION = os.getenv("SOLAR_INDEX_INTERPOLATION", "nearest")  # or "bilinear"
+SOLAR_INDEX_ALTITUDE_TOLERANCE = float(os.getenv("SOLAR_INDEX_ALTITUDE_TOLERANCE", 100))
+
+# Plane-of-array (POA) model defaults; tilt/azimuth can be overridden per request
+POA_DEFAULT_TILT = float(os.getenv("POA_DEFAULT_TILT", 30))
+POA_DEFAULT_AZIMUTH = float(os.getenv("POA_DEFAULT_AZIMUTH", 180))
+POA_DEFAULT_TEMP_AIR = float(os.getenv("POA_DEFAULT_TEMP_AIR", 20))
+POA_DEFAULT_WIND_SPEED = float(os.getenv("POA_DEFAULT_WIND_SPEED", 1))
+POA_TEMP_COEFFICIENT = float(os.getenv("POA_TEMP_COEFFICIENT", -0.004))  # 1/degC
+POA_TEMPERATURE_MODEL = pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["sapm"]["open_rack_glass_polymer"]
+
+# Savings: longest range valued per request
+SAVINGS_MAX_DAYS = int(os.getenv("SAVINGS_MAX_DAYS", 92))
+# Unit of register readings (register does not fix one): energy per slot
+# (kWh, Wh) or average power over the slot (kW, W); requests may override it
+ENERGY_UNITS = ("kWh", "Wh", "kW", "W")
+REGISTER_ENERGY_UNIT = os.getenv("REGISTER_ENERGY_UNIT", "kWh")
+PRICE_SLOT_MINUTES = 15  # entsoe serves day-ahead prices per quarter-hour
+
+# Battery simulation: a year per request (prices are fetched with a day of
+# margin on each side, within entsoe's 366-day range limit)
+BATTERY_MAX_DAYS = int(os.getenv("BATTERY_MAX_DAYS", 364))
+BATTERY_BATCH_MAX_SITES = int(os.getenv("BATTERY_BATCH_MAX_SITES", 1000))
+BATTERY_ROUND_TRIP_EFFICIENCY = float(os.getenv("BATTERY_ROUND_TRIP_EFFICIENCY", 0.9))
+BATTERY_C_RATE = float(os.getenv("BATTERY_C_RATE", 0.5))  # max power as a fraction of capacity per hour
+BATTERY_ARBITRAGE_LOW_QUANTILE = float(os.getenv("BATTERY_ARBITRAGE_LOW_QUANTILE", 0.25))
+BATTERY_ARBITRAGE_HIGH_QUANTILE = float(os.getenv("BATTERY_ARBITRAGE_HIGH_QUANTILE", 0.75))
+
+BATCH_SITE_FIELDS = ["latitude", "longitude", "altitude", "surface", "efficiency", "time_zone"]
+
+http_session = requests.Session()
+http_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=UPSTREAM_POOL_SIZE))
+http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=UPSTREAM_POOL_SIZE))
+upstream_executor = ThreadPoolExecutor(max_workers=UPSTREAM_MAX_WORKERS, thread_name_prefix="upstream")
+
+redis_client = None
+if CLEARSKY_REDIS_HOST:
+    try:
+        # Raw bytes: cached profiles are stored as packed float64 arrays
+        redis_client = redis.Redis(host=CLEARSKY_REDIS_HOST, port=CLEARSKY_REDIS_PORT, db=CLEARSKY_REDIS_DB)
+        redis_client.ping()
+        logging.info("Connected to clear-sky Redis cache at %s:%d", CLEARSKY_REDIS_HOST, CLEARSKY_REDIS_PORT)
+    except Exception as e:
+        logging.warning("Clear-sky Redis cache unavailable (%s:%d): %s", CLEARSKY_REDIS_HOST, CLEARSKY_REDIS_PORT, e)
+        redis_client = None
+
+
+@lru_cache(maxsize=256)
+def _known_timezone(tz: str) -> bool:
+    try:
+        pd.Timestamp.now(tz=tz)
+    except (KeyError, ValueError):
+        return False
+    return True
+
+
+def is_valid_timezone(tz) -> bool:
+    """Whether tz names a time zone pandas can localize to."""
+    return isinstance(tz, str) and _known_timezone(tz)
+
+
+def parse_period(params, tz: str) -> tuple[str, str, str]:
+    """Validates the start/end/freq parameters of a generation request.
+
+    Args:
+        params: Mapping with optional 'start' and 'end' ISO dates (inclusive)
+            and 'freq' (pandas frequency string, a whole number of minutes
+            between 1min and 1h).
+        tz: Timezone used to resolve the default day (today).
+
+    Returns:
+        Tuple (start, end, freq) with ISO dates and a normalized frequency.
+
+    Raises:
+        ValueError: If a parameter or the timezone is invalid or the range
+            is too long.
+    """
+    if not is_valid_timezone(tz):
+        raise ValueError(f"Unknown time zone {tz!r}")
+    start = params.get("start") or pd.Timestamp.now(tz=tz).date().isoformat()
+    end = params.get("end") or start
+
+    try:
+        # JSON bodies may hold any type: only strings are parsed
+        start_day = date.fromisoformat(start)
+        end_day = date.fromisoformat(end)
+    except (TypeError, ValueError):
+        raise ValueError("'start' and 'end' must be dates in YYYY-MM-DD format")
+    if end_day < start_day:
+        raise ValueError("'end' must not be before 'start'")
+    if (end_day - start_day).days + 1 > PVGEN_MAX_DAYS:
+        raise ValueError(f"Range too long (max {PVGEN_MAX_DAYS} days)")
+
+    freq = params.get("freq") or PVGEN_DEFAULT_FREQ
+    try:
+        if not isinstance(freq, str):
+            raise ValueError
+        step = pd.Timedelta(freq)
+    except ValueError:
+        raise ValueError("'freq' must be a fixed frequency such as '15min' or '1h'")
+    if step % pd.Timedelta("1min"):
+        raise ValueError("'freq' must be a whole number of minutes")
+    if not pd.Timedelta("1min") <= step <= pd.Timedelta("1h") or pd.Timedelta("1D") % step:
+        raise ValueError("'freq' must divide one day and be between 1min and 1h")
+
+    return start_day.isoformat(), end_day.isoformat(), f"{int(step.total_seconds() // 60)}min"
+
+
+def get_times(start: str, end: str, freq: str, tz: str) -> pd.DatetimeIndex:
+    """Returns the timestamps covering the days start..end (inclusive) in a timezone."""
+    return pd.date_range(
+        start=pd.Timestamp(start),
+        end=pd.Timestamp(end) + pd.Timedelta(days=1),
+        freq=freq,
+        tz=tz,
+        inclusive="left"
+    )
+
+
+def compute_clearsky_ghi(
+    latitude: float,
+    longitude: float,
+    altitude: float,
+    tz: str,
+    start: str,
+    end: str,
+    freq: str,
+) -> np.ndarray:
+    """Runs the Ineichen clear-sky model for a site and period (uncached)."""
+    location = pvlib.location.Location(
+        latitude=latitude,
+        longitude=longitude,
+        tz=tz,
+        altitude=altitude
+    )
+
+    times = get_times(start, end, freq, tz)
+
+    clearsky = location.get_clearsky(times, model='ineichen')
+    return clearsky['ghi'].to_numpy(dtype=np.float64)
+
 
-# Initialize serializer (same as user_ms)
-serializer = URLSafeSerializer(app.config["SECRET_KEY"], salt="user-cookie")
+class SolarIndex:
+    """Precomputed annual clear-sky geometry for a regular lat/lon grid.
+
+    Built offline by the build-solar-index command. Every array has shape
+    (n_lat, n_lon, n_times) and is opened with mmap_mode='r', so a lookup is
+    a slice of the file and all workers on a host share the same pages
+    through the OS page cache.
+    """
+
+    ARRAYS = ("apparent_zenith", "airmass_relative", "linke_turbidity", "ghi")
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as file:
+            self.meta = json.load(file)
+        self.times = np.load(os.path.join(directory, "times.npy"))
+        self.arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+            for name in self.ARRAYS
+        }
+
+    def _cells(self, latitude: float, longitude: float, interpolation: str):
+        """Returns the (row, col, weight) grid cells used for a site, or None."""
+        meta = self.meta
+        y = (latitude - meta["lat_min"]) / meta["step"]
+        x = (longitude - meta["lon_min"]) / meta["step"]
+        if not (0 <= y <= meta["n_lat"] - 1 and 0 <= x <= meta["n_lon"] - 1):
+            return None
+
+        if interpolation != "bilinear":
+            return [(int(round(y)), int(round(x)), 1.0)]
+
+        y0 = min(int(y), max(meta["n_lat"] - 2, 0))
+        x0 = min(int(x), max(meta["n_lon"] - 2, 0))
+        y1 = min(y0 + 1, meta["n_lat"] - 1)
+        x1 = min(x0 + 1, meta["n_lon"] - 1)
+        dy, dx = y - y0, x - x0
+        return [
+            (y0, x0, (1 - dy) * (1 - dx)),
+            (y0, x1, (1 - dy) * dx),
+            (y1, x0, dy * (1 - dx)),
+            (y1, x1, dy * dx),
+        ]
+
+    def lookup(
+        self,
+        latitude: float,
+        longitude: float,
+        altitude: float,
+        tz: str,
+        start: str,
+        end: str,
+        freq: str,
+        interpolation: str = "nearest",
+    ) -> Optional[np.ndarray]:
+        """Returns the clear-sky GHI for a site and period from the index.
+
+        Returns None when the index does not cover the request (other
+        timezone, frequency, year or location), so callers can fall back to
+        pvlib. Sites whose altitude differs from the index altitude by more
+        than SOLAR_INDEX_ALTITUDE_TOLERANCE reuse the stored geometry and only
+        re-run the Ineichen step.
+        """
+        meta = self.meta
+        if tz != meta["tz"] or freq != meta["freq"]:
+            return None
+
+        times = get_times(start, end, freq, tz)
+        first = int(times[0].timestamp())
+        i0 = int(np.searchsorted(self.times, first))
+        i1 = i0 + len(times)
+        if i1 > len(self.times) or self.times[i0] != first:
+            return None
+
+        cells = self._cells(latitude, longitude, interpolation)
+        if cells is None:
+            return None
+
+        def sample(name: str) -> np.ndarray:
+            if len(cells) == 1:
+                row, col, _ = cells[0]
+                return self.arrays[name][row, col, i0:i1]
+            return sum(weight * self.arrays[name][row, col, i0:i1] for row, col, weight in cells)
+
+        if abs(altitude - meta["altitude"]) <= SOLAR_INDEX_ALTITUDE_TOLERANCE:
+            return sample("ghi")
+
+        airmass_absolute = pvlib.atmosphere.get_absolute_airmass(
+            sample("airmass_relative"),
+            pvlib.atmosphere.alt2pres(altitude),
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            clearsky = pvlib.clearsky.ineichen(
+                sample("apparent_zenith"),
+                airmass_absolute,
+                sample("linke_turbidity"),
+                altitude=altitude,
+                dni_extra=pvlib.irradiance.get_extra_radiation(times).to_numpy(),
+            )
+        return np.nan_to_num(clearsky["ghi"], nan=0.0, posinf=0.0, neginf=0.0)
+
+
+solar_index = None
+if os.path.exists(os.path.join(SOLAR_INDEX_DIR, "meta.json")):
+    try:
+        solar_index = SolarIndex(SOLAR_INDEX_DIR)
+        logging.info("Loaded solar index from %s: %s", SOLAR_INDEX_DIR, solar_index.meta)
+    except Exception as e:
+        logging.warning("Solar index unavailable (%s): %s", SOLAR_INDEX_DIR, e)
+        solar_index = None
+
+
+def lookup_solar_index(
+    latitude: float,
+    longitude: float,
+    altitude: float,
+    tz: str,
+    start: str,
+    end: str,
+    freq: str,
+) -> Optional[np.ndarray]:
+    """Returns the clear-sky GHI from the solar index, or None if not covered."""
+    if solar_index is None:
+        return None
+    return solar_index.lookup(
+        latitude, longitude, altitude, tz, start, end, freq,
+        interpolation=SOLAR_INDEX_INTERPOLATION
+    )
+
+
+@lru_cache(maxsize=CLEARSKY_CACHE_SIZE)
+def get_clearsky_ghi(
+    latitude: float,
+    longitude: float,
+    altitude: float,
+    tz: str,
+    start: str,
+    end: str,
+    freq: str,
+) -> np.ndarray:
+    """Returns the clear-sky GHI profile (W/m2) for a site and period.
+
+    The profile only depends on the site and period, so it is memoized in a
+    bounded process-local LRU. On a miss it is served from the precomputed
+    solar index when that covers the request, then from the shared Redis tier
+    (when configured) and only then computed with pvlib. The returned array
+    is read-only because it is shared between callers.
+
+    Args:
+        latitude: Latitude of the location in degrees.
+        longitude: Longitude of the location in degrees.
+        altitude: Altitude of the location in meters.
+        tz: Timezone of the location (e.g., 'Europe/Berlin').
+        start: First day (YYYY-MM-DD).
+        end: Last day (YYYY-MM-DD), inclusive.
+        freq: Normalized frequency as returned by parse_period.
+
+    Returns:
+        Array of clear-sky GHI values, one per timestamp of the period.
+    """
+    indexed = lookup_solar_index(latitude, longitude, altitude, tz, start, end, freq)
+    if indexed is not None:
+        return indexed
+
+    cache_key = f"clearsky:{latitude}:{longitude}:{altitude}:{tz}:{start}:{end}:{freq}"
+
+    # Try shared cache
+    if redis_client:
+        try:
+            cached = redis_client.get(cache_key)
+            if cached:
+                logging.debug("Clear-sky cache hit for key %s", cache_key)
+                return np.frombuffer(cached, dtype=np.float64)
+        except Exception as e:
+            logging.warning("Redis GET failed: %s", e)
+
+    ghi = compute_clearsky_ghi(latitude, longitude, altitude, tz, start, end, freq)
+    ghi.flags.writeable = False
+
+    # Save to shared cache
+    if redis_client:
+        try:
+            redis_client.set(cache_key, ghi.tobytes(), ex=CLEARSKY_CACHE_TTL_SECONDS)
+            logging.debug("Cached clear-sky profile under key %s", cache_key)
+        except Exception as e:
+            logging.warning("Redis SET failed: %s", e)
+
+    return ghi
+
+
+def compute_clearsky_components(
+    latitude: float,
+    longitude: float,
+    altitude: float,
+    tz: str,
+    start: str,
+    end: str,
+    freq: str,
+) -> np.ndarray:
+    """Runs solar position and the Ineichen model for a site and period (uncached).
+
+    Solar position is evaluated once and reused by the clear-sky model, and
+    the result keeps what the transposition step needs.
+
+    Returns:
+        Array of shape (5, timestamps) with rows apparent_zenith, azimuth,
+        ghi, dni and dhi.
+    """
+    location = pvlib.location.Location(
+        latitude=latitude,
+        longitude=longitude,
+        tz=tz,
+        altitude=altitude
+    )
+
+    times = get_times(start, end, freq, tz)
+
+    solar_position = location.get_solarposition(times)
+    clearsky = location.get_clearsky(times, model='ineichen', solar_position=solar_position)
+    return np.vstack([
+        solar_position["apparent_zenith"].to_numpy(),
+        solar_position["azimuth"].to_numpy(),
+        clearsky["ghi"].to_numpy(),
+        clearsky["dni"].to_numpy(),
+        clearsky["dhi"].to_numpy(),
+    ])
+
+
+@lru_cache(maxsize=CLEARSKY_CACHE_SIZE)
+def get_clearsky_components(
+    latitude: float,
+    longitude: float,
+    altitude: float,
+    tz: str,
+    start: str,
+    end: str,
+    freq: str,
+) -> np.ndarray:
+    """Returns the cached solar position and clear-sky components for a site.
+
+    Same memoization as get_clearsky_ghi; the array is read-only. See
+    compute_clearsky_components for the layout.
+    """
+    components = compute_clearsky_components(latitude, longitude, altitude, tz, start, end, freq)
+    components.flags.writeable = False
+    return components
+
+
+def parse_poa(params) -> Optional[dict]:
+    """Validates the plane-of-array parameters of a generation request.
+
+    Args:
+        params: Mapping with 'model' ('ghi' or 'poa') and, for POA, optional
+            'tilt' (0-90), 'azimuth' (0-360, 180 = south), 'temp_air' (degC)
+            and 'wind_speed' (m/s).
+
+    Returns:
+        None for the plain GHI model, else the keyword arguments of poa_power.
+
+    Raises:
+        ValueError: If a parameter is invalid.
+    """
+    model = params.get("model") or "ghi"
+    if model == "ghi":
+        return None
+    if model != "poa":
+        raise ValueError("'model' must be 'ghi' or 'poa'")
+
+    try:
+        poa = {
+            "tilt": float(params.get("tilt", POA_DEFAULT_TILT)),
+            "azimuth": float(params.get("azimuth", POA_DEFAULT_AZIMUTH)),
+            "temp_air": float(params.get("temp_air", POA_DEFAULT_TEMP_AIR)),
+            "wind_speed": float(params.get("wind_speed", POA_DEFAULT_WIND_SPEED)),
+        }
+    except (TypeError, ValueError):
+        raise ValueError("'tilt', 'azimuth', 'temp_air' and 'wind_speed' must be numbers")
+    if not 0 <= poa["tilt"] <= 90 or not 0 <= poa["azimuth"] <= 360 or poa["wind_speed"] < 0:
+        raise ValueError("'tilt' must be in [0, 90], 'azimuth' in [0, 360] and 'wind_speed' >= 0")
+    return poa
+
+
+def poa_power(
+    components: np.ndarray,
+    surface: float,
+    efficiency: float,
+    tilt: float,
+    azimuth: float,
+    temp_air: float,
+    wind_speed: float,
+) -> np.ndarray:
+    """Converts clear-sky components into plane-of-array PV power.
+
+    Applies the isotropic transposition model for the panel orientation and
+    derates the output with the SAPM cell temperature, using whole-array
+    operations over every timestamp.
+
+    Args:
+        components: Array as returned by compute_clearsky_components.
+        surface: Surface area of PV panels in square meters.
+        efficiency: PV panel efficiency percentage (0-100) at 25 degC.
+        tilt: Panel tilt from horizontal in degrees.
+        azimuth: Panel azimuth in degrees (180 = south).
+        temp_air: Ambient air temperature in degC.
+        wind_speed: Wind speed in m/s.
+
+    Returns:
+        Array of PV power values in watts.
+    """
+    apparent_zenith, solar_azimuth, ghi, dni, dhi = components
+    irradiance = pvlib.irradiance.get_total_irradiance(
+        tilt, azimuth, apparent_zenith, solar_azimuth, dni, ghi, dhi,
+        model="isotropic"
+    )
+    poa_global = np.nan_to_num(np.asarray(irradiance["poa_global"], dtype=np.float64))
+    cell_temperature = pvlib.temperature.sapm_cell(poa_global, temp_air, wind_speed, **POA_TEMPERATURE_MODEL)
+    derate = 1 + POA_TEMP_COEFFICIENT * (cell_temperature - 25)
+    return poa_global * ((efficiency / 100) * surface) * derate
 
 
 def get_PV_gen(
@@ -28,6 +525,10 @@ def get_PV_gen(
     surface: float,
     efficiency: float,
     tz: str,
+    start: str,
+    end: str,
+    freq: str,
+    poa: Optional[dict] = None,
 ) -> list[float]:
     """Calculates photovoltaic (PV) power generation for a location and system.
 
@@ -38,65 +539,526 @@ def get_PV_gen(
         surface: Surface area of PV panels in square meters.
         efficiency: PV panel efficiency percentage (0-100).
         tz: Timezone of the location (e.g., 'Europe/Berlin').
+        start: First day (YYYY-MM-DD).
+        end: Last day (YYYY-MM-DD), inclusive.
+        freq: Normalized frequency as returned by parse_period.
+        poa: Plane-of-array options from parse_poa, or None to use GHI.
 
     Returns:
-        List of hourly PV power generation values in watts for September 21,
-        2024.
+        List of PV power generation values in watts, one per timestamp.
     """
-    location = pvlib.location.Location(
-        latitude=latitude,
-        longitude=longitude,
-        tz=tz,
-        altitude=altitude
+    if poa is not None:
+        components = get_clearsky_components(latitude, longitude, altitude, tz, start, end, freq)
+        return poa_power(components, surface, efficiency, **poa).tolist()
+
+    ghi = get_clearsky_ghi(latitude, longitude, altitude, tz, start, end, freq)
+
+    # Generation is linear in the clear-sky profile, so the system size is a
+    # single scalar applied to the cached array.
+    conversion_factor = (efficiency / 100) * surface
+    return (ghi * conversion_factor).tolist()
+
+
+def iter_PV_gen(
+    latitude: float,
+    longitude: float,
+    altitude: float,
+    surface: float,
+    efficiency: float,
+    tz: str,
+    start: str,
+    end: str,
+    freq: str,
+    poa: Optional[dict] = None,
+):
+    """Yields PV power generation for a long period in chunks of days.
+
+    Each chunk is computed and released before the next one, so peak memory
+    only depends on PVGEN_CHUNK_DAYS and not on the length of the period.
+    Chunks bypass the profile cache to avoid evicting hot single-day entries.
+
+    Yields:
+        Tuples (first timestamp of the chunk, array of power values in watts).
+    """
+    conversion_factor = (efficiency / 100) * surface
+    chunk_start = date.fromisoformat(start)
+    last_day = date.fromisoformat(end)
+    while chunk_start <= last_day:
+        chunk_end = min(chunk_start + timedelta(days=PVGEN_CHUNK_DAYS - 1), last_day)
+        period = (chunk_start.isoformat(), chunk_end.isoformat(), freq)
+        first = pd.Timestamp(chunk_start).tz_localize(tz)
+        if poa is not None:
+            components = compute_clearsky_components(latitude, longitude, altitude, tz, *period)
+            yield first, poa_power(components, surface, efficiency, **poa)
+        else:
+            ghi = lookup_solar_index(latitude, longitude, altitude, tz, *period)
+            if ghi is None:
+                ghi = compute_clearsky_ghi(latitude, longitude, altitude, tz, *period)
+            yield first, ghi * conversion_factor
+        chunk_start = chunk_end + timedelta(days=1)
+
+
+@lru_cache(maxsize=CLEARSKY_CACHE_SIZE)
+def get_linke_turbidity(
+    latitude: float,
+    longitude: float,
+    tz: str,
+    day: str,
+    freq: str,
+) -> np.ndarray:
+    """Returns the Linke turbidity profile for a site and day.
+
+    The climatology grid has a 1/12 degree resolution, so callers should snap
+    coordinates with linke_cell to share entries between nearby sites.
+    """
+    times = get_times(day, day, freq, tz)
+    turbidity = pvlib.clearsky.lookup_linke_turbidity(times, latitude, longitude)
+    return turbidity.to_numpy(dtype=np.float64)
+
+
+def linke_cell(latitude: float, longitude: float) -> tuple[float, float]:
+    """Snaps coordinates to the center of their Linke turbidity grid cell."""
+    lat_center = 90 - 1 / 24 - round((90 - 1 / 24 - latitude) * 12) / 12
+    lon_center = -180 + 1 / 24 + round((longitude + 180 - 1 / 24) * 12) / 12
+    return round(lat_center, 6), round(lon_center, 6)
+
+
+def get_clearsky_ghi_matrix(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    altitudes: np.ndarray,
+    tz: str,
+    day: str,
+    freq: str,
+) -> np.ndarray:
+    """Calculates clear-sky GHI for many sites sharing a timezone at once.
+
+    Solar position is evaluated with the analytical (Spencer) model, which
+    broadcasts over a sites x timestamps matrix, and the Ineichen model is then
+    applied to the whole matrix in a single NumPy pass. Values agree with
+    get_clearsky_ghi to within a few W/m2.
+
+    Args:
+        latitudes: Latitudes of the sites in degrees, shape (n,).
+        longitudes: Longitudes of the sites in degrees, shape (n,).
+        altitudes: Altitudes of the sites in meters, shape (n,).
+        tz: Timezone shared by all sites (e.g., 'Europe/Berlin').
+        day: Day to evaluate (YYYY-MM-DD).
+        freq: Normalized frequency as returned by parse_period.
+
+    Returns:
+        Array of shape (n, timestamps) with clear-sky GHI values in W/m2.
+    """
+    times = get_times(day, day, freq, tz)
+
+    # Site independent terms (one value per timestamp)
+    day_of_year = times.dayofyear.to_numpy()
+    declination = pvlib.solarposition.declination_spencer71(day_of_year)
+    equation_of_time = pvlib.solarposition.equation_of_time_spencer71(day_of_year)
+    dni_extra = pvlib.irradiance.get_extra_radiation(times).to_numpy()
+    utc = times.tz_convert("UTC")
+    utc_hours = (utc.hour + utc.minute / 60 + utc.second / 3600).to_numpy()
+
+    # Sites x timestamps terms
+    hour_angle = 15 * (utc_hours - 12) + longitudes[:, None] + equation_of_time / 4
+    zenith = np.degrees(pvlib.solarposition.solar_zenith_analytical(
+        np.radians(latitudes)[:, None],
+        np.radians(hour_angle),
+        declination,
+    ))
+
+    airmass_relative = pvlib.atmosphere.get_relative_airmass(zenith)
+    airmass_absolute = pvlib.atmosphere.get_absolute_airmass(
+        airmass_relative,
+        pvlib.atmosphere.alt2pres(altitudes)[:, None],
     )
+    linke_turbidity = np.stack([
+        get_linke_turbidity(*linke_cell(latitude, longitude), tz, day, freq)
+        for latitude, longitude in zip(latitudes.tolist(), longitudes.tolist())
+    ])
+
+    # Night-time entries are NaN/inf inside the model and are zeroed below
+    with np.errstate(divide="ignore", invalid="ignore"):
+        clearsky = pvlib.clearsky.ineichen(
+            zenith,
+            airmass_absolute,
+            linke_turbidity,
+            altitude=altitudes[:, None],
+            dni_extra=dni_extra,
+        )
+    return np.nan_to_num(clearsky["ghi"], nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def get_PV_gen_batch(sites: list[dict], day: str, freq: str) -> list[list[float]]:
+    """Calculates PV power generation for many sites in one vectorized pass.
+
+    Args:
+        sites: List of site dicts with the keys in BATCH_SITE_FIELDS.
+        day: Day to evaluate (YYYY-MM-DD), in each site's local time.
+        freq: Normalized frequency as returned by parse_period.
+
+    Returns:
+        One list of power values in watts per site, in the same order as the
+        input sites. Rows of sites in different timezones may differ in
+        length on daylight saving transition days.
+    """
+    latitudes = np.array([float(site["latitude"]) for site in sites])
+    longitudes = np.array([float(site["longitude"]) for site in sites])
+    altitudes = np.array([float(site["altitude"]) for site in sites])
+    surfaces = np.array([float(site["surface"]) for site in sites])
+    efficiencies = np.array([float(site["efficiency"]) for site in sites])
+    timezones = np.array([str(site["time_zone"]) for site in sites])
+
+    power = [None] * len(sites)
+    for tz in np.unique(timezones):
+        idx = np.flatnonzero(timezones == tz)
+        ghi = get_clearsky_ghi_matrix(latitudes[idx], longitudes[idx], altitudes[idx], tz, day, freq)
+        rows = ghi * ((efficiencies[idx] / 100) * surfaces[idx])[:, None]
+        for i, row in zip(idx.tolist(), rows):
+            power[i] = row.tolist()
+    return power
+
+
+def minute_of_day(label) -> int:
+    """Minutes since midnight of a register slot label ('7' or '07:45')."""
+    hours, _, minutes = str(label).partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def register_series(days: list[dict]) -> tuple[int, np.ndarray, np.ndarray]:
+    """Turns /register/get_day 'days' into production and consumption arrays.
+
+    Register days hold 24 hourly ('7') or 96 quarter-hour ('07:45') slots;
+    the slot length is taken from the labels. Slots without a reading are 0,
+    as in calculate_surplus.
 
-    times = pd.date_range(
-        start=datetime(2024, 9, 21, 0),
-        end=datetime(2024, 9, 21, 23, 59),
-        freq='15min',
-        tz=tz
+    Returns:
+        Tuple (slots_per_day, production, consumption), one value per slot
+        of every day in order.
+    """
+    labelled = [item["hour"] for day in days for field in ("production", "consumption") for item in day.get(field, [])]
+    slots_per_day = 96 if any(":" in str(label) for label in labelled) else 24
+    minutes_per_slot = 1440 // slots_per_day
+
+    series = []
+    for field in ("production", "consumption"):
+        index, values = [], []
+        for i, day in enumerate(days):
+            for item in day.get(field, []):
+                index.append(i * slots_per_day + minute_of_day(item["hour"]) // minutes_per_slot)
+                values.append(item["value"])
+        array = np.zeros(len(days) * slots_per_day)
+        array[index] = values
+        series.append(array)
+    return slots_per_day, series[0], series[1]
+
+
+def slot_times(start: str, days: int, slots_per_day: int, tz: str) -> pd.DatetimeIndex:
+    """UTC start of each register slot of `days` local days from start.
+
+    Register days always have slots_per_day slots: repeated local times on
+    the autumn DST change resolve to standard time, skipped ones to NaT.
+    """
+    local = pd.date_range(start, periods=days * slots_per_day, freq=f"{1440 // slots_per_day}min")
+    return local.tz_localize(tz, ambiguous=np.zeros(len(local), dtype=bool), nonexistent="NaT").tz_convert("UTC")
+
+
+def align_prices(prices: list, prices_start: str, times: pd.DatetimeIndex, slot_minutes: int) -> np.ndarray:
+    """Averages quarter-hour prices over each slot starting at `times`.
+
+    Args:
+        prices: Quarter-hour prices from prices_start, None where unknown.
+        prices_start: UTC ISO timestamp of the first price.
+        times: UTC slot starts (see slot_times).
+        slot_minutes: Slot length, a multiple of PRICE_SLOT_MINUTES.
+
+    Returns:
+        One price per slot, NaN where none of its quarter-hours has a price.
+    """
+    values = np.array(prices, dtype=float)
+    factor = slot_minutes // PRICE_SLOT_MINUTES
+    elapsed = (times - pd.Timestamp(prices_start)) // pd.Timedelta(minutes=PRICE_SLOT_MINUTES)
+    first = np.nan_to_num(np.asarray(elapsed, dtype=float), nan=-1).astype(np.int64)
+    index = first[:, None] + np.arange(factor)
+    valid = ~times.isna()[:, None] & (index >= 0) & (index < len(values))
+
+    quarters = np.full(index.shape, np.nan)
+    quarters[valid] = values[index[valid]]
+    known = ~np.isnan(quarters)
+    counts = known.sum(axis=1)
+    sums = np.where(known, quarters, 0).sum(axis=1)
+    return np.divide(sums, counts, out=np.full(len(times), np.nan), where=counts > 0)
+
+
+def parse_energy_unit(body: dict) -> str:
+    """Returns the 'unit' of a request body, REGISTER_ENERGY_UNIT by default.
+
+    Raises:
+        ValueError: If the unit is not one of ENERGY_UNITS.
+    """
+    unit = body.get("unit", REGISTER_ENERGY_UNIT)
+    if unit not in ENERGY_UNITS:
+        raise ValueError(f"'unit' must be one of {', '.join(ENERGY_UNITS)}")
+    return unit
+
+
+def kwh_per_unit(unit: str, slot_minutes: int) -> float:
+    """Factor converting a reading in `unit` over one slot to kWh."""
+    hours = slot_minutes / 60
+    return {"kWh": 1.0, "Wh": 1e-3, "kW": hours, "W": hours * 1e-3}[unit]
+
+
+def compute_savings(production: np.ndarray, consumption: np.ndarray,
+                    spot_price: np.ndarray, import_price: np.ndarray) -> dict[str, np.ndarray]:
+    """Values the energy flows of every slot in one vectorized pass.
+
+    Args:
+        production, consumption: Energy per slot in kWh.
+        spot_price: Day-ahead price per slot in EUR/kWh, paid for exports.
+        import_price: Tariff per slot in EUR/kWh, paid for grid imports.
+
+    Returns:
+        Dict of per-slot arrays: surplus, exported, imported and
+        self_consumed (kWh), export_revenue, avoided_cost, grid_cost (imports
+        minus export revenue) and cost_without_pv (EUR). Money is NaN in
+        slots without a price.
+    """
+    surplus = production - consumption
+    exported = np.maximum(surplus, 0)
+    imported = np.maximum(-surplus, 0)
+    self_consumed = np.minimum(production, consumption)
+    export_revenue = exported * spot_price
+    return {
+        "surplus": surplus,
+        "exported": exported,
+        "imported": imported,
+        "self_consumed": self_consumed,
+        "export_revenue": export_revenue,
+        "avoided_cost": self_consumed * import_price,
+        "grid_cost": imported * import_price - export_revenue,
+        "cost_without_pv": consumption * import_price,
+    }
+
+
+def arbitrage_windows(prices: np.ndarray, slots_per_day: int) -> tuple[np.ndarray, np.ndarray]:
+    """Marks the cheap and the peak slots of each day.
+
+    Thresholds are the daily BATTERY_ARBITRAGE_LOW/HIGH_QUANTILE prices:
+    cheap slots are at or below the low one (and below the high one, so
+    flat prices never trigger grid charging); peak slots are those not
+    below the high one. Slots without a price count as peak.
+
+    Args:
+        prices: Prices of shape (rows, steps).
+        slots_per_day: Steps per day.
+
+    Returns:
+        Tuple (cheap, peak) of boolean arrays shaped like prices.
+    """
+    rows, steps = prices.shape
+    days = -(-steps // slots_per_day)
+    daily = np.full((rows, days * slots_per_day), np.nan)
+    daily[:, :steps] = prices
+    daily = daily.reshape(rows, days, slots_per_day)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # days without prices
+        low = np.nanquantile(daily, BATTERY_ARBITRAGE_LOW_QUANTILE, axis=2, keepdims=True)
+        high = np.nanquantile(daily, BATTERY_ARBITRAGE_HIGH_QUANTILE, axis=2, keepdims=True)
+    below_high = (daily < high).reshape(rows, -1)[:, :steps]
+    cheap = (daily <= low).reshape(rows, -1)[:, :steps] & below_high
+    return cheap, ~below_high
+
+
+def later_today(values: np.ndarray, slots_per_day: int) -> np.ndarray:
+    """Sum of the values of the remaining steps of the same day.
+
+    Args:
+        values: Step-major array of shape (steps, sites).
+        slots_per_day: Steps per day.
+
+    Returns:
+        Array shaped like values; each step excludes itself.
+    """
+    steps, sites = values.shape
+    days = -(-steps // slots_per_day)
+    daily = np.zeros((days * slots_per_day, sites))
+    daily[:steps] = values
+    daily = daily.reshape(days, slots_per_day, sites)
+    remaining = np.cumsum(daily[:, ::-1], axis=1)[:, ::-1] - daily
+    return remaining.reshape(-1, sites)[:steps]
+
+
+def simulate_battery(surplus: np.ndarray, capacity: np.ndarray, slot_minutes: int,
+                     prices: Optional[np.ndarray] = None, initial_soc: float = 0.0) -> dict[str, np.ndarray]:
+    """Dispatches one battery per site over a surplus time series.
+
+    The battery charges from surplus and discharges into deficits, limited
+    to BATTERY_C_RATE, with BATTERY_ROUND_TRIP_EFFICIENCY split evenly
+    between charging and discharging. With prices it also arbitrages (see
+    arbitrage_windows), taking the surplus series as a perfect forecast of
+    the rest of the day:
+
+    - In cheap slots it charges from the grid what the rest of the day's
+      deficit outside cheap slots will draw, but never more than the room
+      the day's remaining surplus leaves; it only discharges what exceeds
+      that need.
+    - In peak slots it discharges into the deficit.
+    - In other slots it discharges what exceeds the reserve for the day's
+      remaining peak deficit.
+
+    Grid charging thus never displaces stored surplus, but the energy
+    imported in cheap slots and the conversion losses may raise grid_import
+    above the plain dispatch while lowering its cost.
+
+    The state of charge is a clipped recursion, so the time loop stays
+    sequential, but each step is a handful of vector operations across all
+    sites: a year of 15 min steps for a whole community takes seconds.
+
+    Args:
+        surplus: Surplus energy per step in kWh (negative for deficit),
+            shape (sites, steps).
+        capacity: Usable capacity in kWh per site.
+        slot_minutes: Step length; must divide one day.
+        prices: Optional prices of shape (steps,) or (sites, steps).
+        initial_soc: Initial state of charge as a fraction of capacity.
+
+    Returns:
+        Dict of (sites, steps) arrays in kWh: soc (after each step), charge
+        (from surplus), grid_charge, discharge, grid_import and grid_export.
+    """
+    energy = np.asarray(surplus, dtype=float)
+    sites, steps = energy.shape
+    capacity = np.asarray(capacity, dtype=float)
+    efficiency = np.sqrt(BATTERY_ROUND_TRIP_EFFICIENCY)
+    max_step = capacity * BATTERY_C_RATE * slot_minutes / 60
+    slots_per_day = 1440 // slot_minutes
+
+    # Step-major copies so that every step reads contiguous rows
+    excess = np.ascontiguousarray(np.maximum(energy, 0).T)
+    deficit = np.ascontiguousarray(np.maximum(-energy, 0).T)
+    if prices is None:
+        cheap = np.zeros((steps, 1), dtype=bool)
+        peak = np.ones((steps, 1), dtype=bool)
+        surplus_to_come = demand = reserve = np.zeros((steps, 1))
+    else:
+        cheap, peak = arbitrage_windows(np.atleast_2d(np.asarray(prices, dtype=float)), slots_per_day)
+        cheap, peak = np.ascontiguousarray(cheap.T), np.ascontiguousarray(peak.T)
+        # Stored energy still to come from surplus, and drawn outside cheap
+        # and in peak slots, later the same day
+        surplus_to_come = later_today(np.minimum(excess, max_step) * efficiency, slots_per_day)
+        drawn = np.minimum(deficit, max_step) / efficiency
+        demand = later_today(np.where(cheap, 0, drawn), slots_per_day)
+        reserve = later_today(np.where(peak, drawn, 0), slots_per_day)
+
+    soc = np.empty((steps, sites))
+    charge = np.empty((steps, sites))
+    grid_charge = np.zeros((steps, sites))
+    discharge = np.empty((steps, sites))
+    level = capacity * initial_soc
+    for t in range(steps):
+        headroom = (capacity - level) / efficiency
+        charge[t] = np.minimum(np.minimum(excess[t], headroom), max_step)
+        if cheap[t].any():
+            target = np.minimum(capacity - surplus_to_come[t], demand[t])
+            grid_room = np.maximum(target - level, 0) / efficiency
+            grid_charge[t] = np.where(
+                cheap[t], np.maximum(np.minimum(grid_room, max_step) - charge[t], 0), 0
+            )
+        keep = np.where(peak[t], 0, np.where(cheap[t], demand[t], reserve[t]))
+        discharge[t] = np.minimum(np.minimum(deficit[t], np.maximum(level - keep, 0) * efficiency), max_step)
+        level = np.clip(level + (charge[t] + grid_charge[t]) * efficiency - discharge[t] / efficiency, 0, capacity)
+        soc[t] = level
+
+    return {
+        "soc": soc.T,
+        "charge": charge.T,
+        "grid_charge": grid_charge.T,
+        "discharge": discharge.T,
+        "grid_import": (deficit - discharge + grid_charge).T,
+        "grid_export": (excess - charge).T,
+    }
+
+
+def _json_values(values: np.ndarray) -> list:
+    """Rounded floats for JSON, NaN as None."""
+    return [None if value != value else value for value in np.round(values, 6).tolist()]
+
+
+def post_upstream(url: str, payload: dict, req) -> requests.Response:
+    """POSTs JSON to another microservice over the shared keep-alive pool.
+
+    Forwards the caller's cookies and, when enabled, the internal identity
+    header so the upstream service does not verify the cookie again.
+    """
+    return http_session.post(
+        url,
+        json=payload,
+        cookies=req.cookies,
+        headers=identity_headers(req),
+        timeout=UPSTREAM_TIMEOUT_SECONDS
     )
 
-    clearsky = location.get_clearsky(times, model='ineichen')
-    ghi = clearsky['ghi'].tolist()
 
-    conversion_factor = (efficiency / 100) * surface
-    return [irradiance * conversion_factor for irradiance in ghi]
+def get_upstream(url: str, params: dict, req) -> requests.Response:
+    """GETs from another microservice like post_upstream."""
+    return http_session.get(
+        url,
+        params=params,
+        cookies=req.cookies,
+        headers=identity_headers(req),
+        timeout=UPSTREAM_TIMEOUT_SECONDS
+    )
+
+
+def upstream_error(response: requests.Response, message: str):
+    """Error response for a failed upstream call.
+
+    Client errors (4xx, e.g. a country without bidding zone) are passed
+    through with the upstream status and message; anything else is a 500
+    with the given message.
+    """
+    if 400 <= response.status_code < 500:
+        try:
+            error = response.json().get("error") or message
+        except ValueError:
+            error = message
+        return jsonify({"error": error}), response.status_code
+    return jsonify({"error": message}), 500
 
 
 def get_user_from_cookie(req):
     """Extract and validate user data from cookie."""
-    cookie = req.cookies.get("user_data")
-    if not cookie:
+    try:
+        profile = get_user_profile(req)
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 401)
+    if profile is None:
         return None, (jsonify({"error": "Authentication required"}), 401)
 
+    user_data = {
+        "latitude": profile.latitude,
+        "longitude": profile.longitude,
+        "altitude": profile.altitude,
+        "surface": profile.surface,
+        "efficiency": profile.efficiency,
+        "timezone": profile.time_zone
+    }
+    if not all(user_data.values()):
+        return None, (jsonify({"error": "Missing required user data in cookie"}), 400)
+    return user_data, None
+
+
+def get_profile_from_cookie(req):
+    """Return the user's profile for endpoints that need more than the site."""
     try:
-        data = serializer.loads(cookie)
-        
-        # Extract required fields
-        latitude = float(data.get("latitude"))
-        longitude = float(data.get("longitude"))
-        altitude = float(data.get("altitude"))
-        surface = float(data.get("surface"))
-        efficiency = float(data.get("efficiency"))
-        timezone = data.get("time_zone")
-        
-        if not all([latitude, longitude, altitude, surface, efficiency, timezone]):
-            return None, (jsonify({"error": "Missing required user data in cookie"}), 400)
-        
-        return {
-            "latitude": latitude,
-            "longitude": longitude,
-            "altitude": altitude,
-            "surface": surface,
-            "efficiency": efficiency,
-            "timezone": timezone
-        }, None
-    
+        profile = get_user_profile(req)
     except ValueError as e:
-        return None, (jsonify({"error": f"Invalid coordinate values: {str(e)}"}), 400)
-    except Exception as e:
-        return None, (jsonify({"error": f"Invalid cookie: {str(e)}"}), 401)
+        return None, (jsonify({"error": str(e)}), 401)
+    if profile is None:
+        return None, (jsonify({"error": "Authentication required"}), 401)
+    if not profile.time_zone or not profile.country:
+        return None, (jsonify({"error": "Missing required user data in cookie"}), 400)
+    return profile, None
 
 
 @app.route("/processing/pvlibGen", methods=["GET"])
@@ -105,10 +1067,20 @@ def pvlib_production():
 
     Gets location and system data from user_data cookie.
 
+    Query parameters:
+        start (str, optional): First day (YYYY-MM-DD). Defaults to today.
+        end (str, optional): Last day (YYYY-MM-DD), inclusive. Defaults to start.
+        freq (str, optional): Resolution between 1min and 1h. Defaults to 15min.
+        format (str, optional): 'ndjson' streams the result as one JSON line
+            per chunk of days; required for ranges above PVGEN_MAX_JSON_DAYS.
+        model (str, optional): 'ghi' (default) or 'poa' for the plane-of-array
+            model with temperature derating.
+        tilt, azimuth, temp_air, wind_speed (float, optional): POA options.
+
     Returns:
         JSON response with power values or error message:
         - 401 for missing/invalid cookie
-        - 400 for missing user data
+        - 400 for missing user data or invalid period
         - 500 for calculation errors
         - 200 with power data on success
     """
@@ -116,6 +1088,39 @@ def pvlib_production():
     if err:
         return err
 
+    try:
+        start, end, freq = parse_period(request.args, user_data["timezone"])
+        poa = parse_poa(request.args)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    site = {
+        "latitude": user_data["latitude"],
+        "longitude": user_data["longitude"],
+        "altitude": user_data["altitude"],
+        "surface": user_data["surface"],
+        "efficiency": user_data["efficiency"],
+        "tz": user_data["timezone"],
+    }
+
+    if request.args.get("format") == "ndjson":
+        logging.info("Streaming PV generation from %s to %s (%s)", start, end, freq)
+
+        def generate():
+            for first, power in iter_PV_gen(**site, start=start, end=end, freq=freq, poa=poa):
+                yield json.dumps({
+                    "start": first.isoformat(),
+                    "freq": freq,
+                    "power": power.tolist()
+                }) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    if (date.fromisoformat(end) - date.fromisoformat(start)).days + 1 > PVGEN_MAX_JSON_DAYS:
+        return jsonify({
+            "error": f"Ranges above {PVGEN_MAX_JSON_DAYS} days require format=ndjson"
+        }), 400
+
     try:
         logging.info(
             "Processing PV generation request for coordinates: %f,%f",
@@ -123,19 +1128,16 @@ def pvlib_production():
             user_data["longitude"]
         )
         
-        power_array = get_PV_gen(
-            latitude=user_data["latitude"],
-            longitude=user_data["longitude"],
-            altitude=user_data["altitude"],
-            surface=user_data["surface"],
-            efficiency=user_data["efficiency"],
-            tz=user_data["timezone"]
-        )
+        power_array = get_PV_gen(**site, start=start, end=end, freq=freq, poa=poa)
 
         logging.info("Generated power array with %d values", len(power_array))
         
         return jsonify({
             "user": user_data,
+            "start": start,
+            "end": end,
+            "freq": freq,
+            "model": "poa" if poa else "ghi",
             "power": power_array
         }), 200
 
@@ -147,12 +1149,71 @@ def pvlib_production():
         return jsonify({"error": str(error)}), 500
 
 
+@app.route("/processing/pvlibGen/batch", methods=["POST"])
+def pvlib_production_batch():
+    """Calculates photovoltaic power generation for many sites at once.
+
+    Request body:
+        sites (list): Site configurations with latitude, longitude, altitude,
+            surface, efficiency and time_zone (same keys as the user cookie).
+        day (str, optional): Day (YYYY-MM-DD). Defaults to today (UTC).
+        freq (str, optional): Resolution between 1min and 1h. Defaults to 15min.
+
+    Returns:
+        JSON response with a columnar power matrix or error message:
+        - 401 for missing/invalid cookie
+        - 400 for missing or invalid sites
+        - 500 for calculation errors
+        - 200 with one power row per site (request order) on success
+    """
+    _, err = get_user_from_cookie(request)
+    if err:
+        return err
+
+    body = request.get_json(silent=True) or {}
+    sites = body.get("sites")
+    if not isinstance(sites, list) or not sites:
+        return jsonify({"error": "Missing 'sites' list"}), 400
+    if len(sites) > PVGEN_BATCH_MAX_SITES:
+        return jsonify({"error": f"Too many sites (max {PVGEN_BATCH_MAX_SITES})"}), 400
+    for i, site in enumerate(sites):
+        if not isinstance(site, dict) or any(site.get(key) is None for key in BATCH_SITE_FIELDS):
+            return jsonify({"error": f"Site {i} must define {', '.join(BATCH_SITE_FIELDS)}"}), 400
+        if not is_valid_timezone(site["time_zone"]):
+            return jsonify({"error": f"Site {i} has an unknown time_zone {site['time_zone']!r}"}), 400
+
+    try:
+        day, _, freq = parse_period({"start": body.get("day"), "freq": body.get("freq")}, "UTC")
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    try:
+        logging.info("Processing batch PV generation request for %d sites", len(sites))
+
+        power = get_PV_gen_batch(sites, day, freq)
+
+        return jsonify({
+            "day": day,
+            "freq": freq,
+            "count": len(sites),
+            "power": power
+        }), 200
+
+    except ValueError as error:
+        logging.error(f"ValueError: {error}")
+        return jsonify({"error": "Invalid parameter values"}), 400
+    except Exception as error:
+        logging.error(f"Exception: {error}")
+        return jsonify({"error": str(error)}), 500
+
+
 @app.route("/processing/surplus", methods=["POST"])
 def calculate_surplus():
     """Calculates surplus from register microservice.
     
     Retrieves production and consumption data for a given day from the register
-    microservice, then calculates surplus (production - consumption) hour by hour.
+    microservice (one /register/get_day call), then calculates surplus
+    (production - consumption) hour by hour.
     
     Request body:
         day (str, optional): Date in ISO format (YYYY-MM-DD). Defaults to today.
@@ -178,33 +1239,21 @@ def calculate_surplus():
         
         logging.info("Calculating surplus for day: %s", day)
         
-        # Get production data from register microservice
-        prod_response = requests.post(
-            f"{REGISTER_SERVICE_URL}/register/get_production_day",
-            json={"day": day},
-            cookies=request.cookies,
-            timeout=10
-        )
-        
-        if prod_response.status_code != 200:
-            logging.error("Failed to get production data: %s", prod_response.text)
-            return jsonify({"error": "Failed to retrieve production data"}), 500
-        
-        production_data = prod_response.json().get("production", [])
-        
-        # Get consumption data from register microservice
-        cons_response = requests.post(
-            f"{REGISTER_SERVICE_URL}/register/get_consumption_day",
-            json={"day": day},
-            cookies=request.cookies,
-            timeout=10
+        # Get production and consumption data from register microservice
+        # in a single call
+        day_response = post_upstream(
+            f"{REGISTER_SERVICE_URL}/register/get_day",
+            {"day": day},
+            request
         )
         
-        if cons_response.status_code != 200:
-            logging.error("Failed to get consumption data: %s", cons_response.text)
-            return jsonify({"error": "Failed to retrieve consumption data"}), 500
+        if day_response.status_code != 200:
+            logging.error("Failed to get production/consumption data: %s", day_response.text)
+            return jsonify({"error": "Failed to retrieve production and consumption data"}), 500
         
-        consumption_data = cons_response.json().get("consumption", [])
+        day_data = day_response.json()
+        production_data = day_data.get("production", [])
+        consumption_data = day_data.get("consumption", [])
         
         # Calculate surplus hour by hour
         surplus_data = []
@@ -216,8 +1265,8 @@ def calculate_surplus():
         # Get all unique hours
         all_hours = set(prod_dict.keys()) | set(cons_dict.keys())
         
-        # Calculate surplus for each hour
-        for hour in sorted(all_hours, key=lambda x: int(x)):
+        # Calculate surplus for each hour (or quarter-hour slot)
+        for hour in sorted(all_hours, key=minute_of_day):
             production = prod_dict.get(hour, 0)
             consumption = cons_dict.get(hour, 0)
             surplus = production - consumption
@@ -247,5 +1296,418 @@ def calculate_surplus():
         return jsonify({"error": str(error)}), 500
 
 
+def get_energy_and_prices(req, start: date, days: int, tz: str, with_prices: bool = True):
+    """Fetches register readings and day-ahead prices for local days in parallel.
+
+    Register (/register/get_day with a days list) and entsoe (a
+    /entsoe/prices range query for the user's country) are called on the
+    upstream executor; local days span the UTC days around them, so the
+    prices are requested with a day of margin on each side.
+
+    Returns:
+        Tuple ((slots_per_day, production, consumption, spot_price), None),
+        spot_price in EUR/kWh per register slot (None without with_prices),
+        or (None, error response), passing upstream 4xx errors through.
+    """
+    req = req._get_current_object()
+    register_future = upstream_executor.submit(
+        post_upstream,
+        f"{REGISTER_SERVICE_URL}/register/get_day",
+        {"days": [(start + timedelta(days=i)).isoformat() for i in range(days)]},
+        req
+    )
+    prices_future = upstream_executor.submit(
+        get_upstream,
+        f"{ENTSOE_SERVICE_URL}/entsoe/prices",
+        {
+            "from": (start - timedelta(days=1)).isoformat(),
+            "to": (start + timedelta(days=days)).isoformat()
+        },
+        req
+    ) if with_prices else None
+    register_response = register_future.result()
+    prices_response = prices_future.result() if prices_future else None
+
+    if register_response.status_code != 200:
+        logging.error("Failed to get production/consumption data: %s", register_response.text)
+        return None, upstream_error(register_response, "Failed to retrieve production and consumption data")
+    if prices_response is not None and prices_response.status_code != 200:
+        logging.error("Failed to get day-ahead prices: %s", prices_response.text)
+        return None, upstream_error(prices_response, "Failed to retrieve day-ahead prices")
+
+    slots_per_day, production, consumption = register_series(register_response.json()["days"])
+    spot_price = None
+    if prices_response is not None:
+        prices = prices_response.json()
+        times = slot_times(start.isoformat(), days, slots_per_day, tz)
+        spot_price = align_prices(
+            next(iter(prices["prices"].values())), prices["start"], times, 1440 // slots_per_day
+        ) / 1000  # EUR/MWh -> EUR/kWh
+    return (slots_per_day, production, consumption, spot_price), None
+
+
+def parse_days(body: dict, max_days: int) -> tuple[date, date, int]:
+    """Validates the from/to days of a request body.
+
+    Returns:
+        Tuple (start, end, number of days).
+
+    Raises:
+        ValueError: If a day is invalid or the range is too long.
+    """
+    try:
+        start = date.fromisoformat(str(body.get("from")))
+        end = date.fromisoformat(str(body.get("to") or body.get("from")))
+    except ValueError:
+        raise ValueError("'from' and 'to' must be dates in YYYY-MM-DD format")
+    if end < start:
+        raise ValueError("'to' must not be before 'from'")
+    days = (end - start).days + 1
+    if days > max_days:
+        raise ValueError(f"Range too long (max {max_days} days)")
+    return start, end, days
+
+
+@app.route("/processing/savings", methods=["POST"])
+def calculate_savings():
+    """Values the user's surplus and self-consumption against day-ahead prices.
+
+    Production and consumption (register) and the prices of the user's
+    country (entsoe price history) are fetched in parallel, aligned slot by
+    slot in UTC and valued in one vectorized pass. Exports earn the
+    day-ahead price; imports cost the user's tariff: 'value' (EUR/kWh) for
+    fee_type FIXED, the day-ahead price otherwise.
+
+    Request body:
+        from (str): First local day (YYYY-MM-DD).
+        to (str, optional): Last local day (inclusive). Defaults to 'from'.
+        unit (str, optional): Unit of the register readings (kWh, Wh, kW
+            or W). Defaults to REGISTER_ENERGY_UNIT.
+
+    Returns:
+        JSON response with per-slot arrays (energy in kWh) and totals or
+        error message:
+        - 401 for missing/invalid cookie
+        - 400 for missing user data or invalid range or unit
+        - 4xx passed through from the register or entsoe service
+        - 500 for register or entsoe errors
+        - 200 with the savings on success
+    """
+    profile, err = get_profile_from_cookie(request)
+    if err:
+        return err
+    if not profile.fee_type:
+        return jsonify({"error": "Missing required user data in cookie"}), 400
+    if profile.fee_type == "FIXED" and profile.value is None:
+        return jsonify({"error": "Missing fixed tariff value in cookie"}), 400
+
+    body = request.get_json(silent=True) or {}
+    try:
+        start, end, days = parse_days(body, SAVINGS_MAX_DAYS)
+        unit = parse_energy_unit(body)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    try:
+        logging.info("Calculating savings from %s to %s", start, end)
+
+        data, err = get_energy_and_prices(request, start, days, profile.time_zone)
+        if err:
+            return err
+        slots_per_day, production, consumption, spot_price = data
+        slot_minutes = 1440 // slots_per_day
+        to_kwh = kwh_per_unit(unit, slot_minutes)
+        production, consumption = production * to_kwh, consumption * to_kwh
+        if profile.fee_type == "FIXED":
+            import_price = np.full(len(spot_price), float(profile.value))
+        else:
+            import_price = spot_price
+
+        savings = compute_savings(production, consumption, spot_price, import_price)
+        totals = {name: round(float(np.nansum(values)), 6) for name, values in savings.items() if name != "surplus"}
+        totals["savings"] = round(totals["cost_without_pv"] - totals["grid_cost"], 6)
+        totals["unpriced_slots"] = int(np.isnan(spot_price).sum())
+
+        logging.info("Calculated savings for %d slots", len(spot_price))
+
+        return jsonify({
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "timezone": profile.time_zone,
+            "freq": f"{slot_minutes}min",
+            "fee_type": profile.fee_type,
+            "unit": unit,
+            "production": _json_values(production),
+            "consumption": _json_values(consumption),
+            "surplus": _json_values(savings["surplus"]),
+            "spot_price": _json_values(spot_price),
+            "import_price": _json_values(import_price),
+            "export_revenue": _json_values(savings["export_revenue"]),
+            "avoided_cost": _json_values(savings["avoided_cost"]),
+            "totals": totals
+        }), 200
+
+    except requests.exceptions.Timeout:
+        logging.error("Timeout connecting to register or entsoe service")
+        return jsonify({"error": "Upstream service timeout"}), 500
+    except requests.exceptions.ConnectionError as e:
+        logging.error("Connection error: %s", str(e))
+        return jsonify({"error": "Failed to connect to upstream service"}), 500
+    except Exception as error:
+        logging.error(f"Exception: {error}")
+        return jsonify({"error": str(error)}), 500
+
+
+@app.route("/processing/battery", methods=["POST"])
+def battery_simulation():
+    """Simulates the user's battery over their registered surplus.
+
+    Uses battery and battery_energy_capacity from the user_data cookie and
+    the production and consumption stored in register (see simulate_battery
+    for the dispatch rules).
+
+    Request body:
+        from (str): First local day (YYYY-MM-DD).
+        to (str, optional): Last local day (inclusive). Defaults to 'from'.
+        arbitrage (bool, optional): Also charge from the grid in cheap slots
+            (up to the room the day's surplus leaves) and save the charge for
+            dear ones, using the day-ahead prices of the user's country. This
+            lowers the energy cost, but may import more energy. Defaults to
+            false.
+        initial_soc (float, optional): Initial state of charge (0-1). Defaults to 0.
+        unit (str, optional): Unit of the register readings (kWh, Wh, kW
+            or W). Defaults to REGISTER_ENERGY_UNIT.
+
+    Returns:
+        JSON response with per-slot arrays in kWh and totals or error message:
+        - 401 for missing/invalid cookie
+        - 400 for a user without battery or invalid parameters
+        - 4xx passed through from the register or entsoe service
+        - 500 for register or entsoe errors
+        - 200 with the simulation on success
+    """
+    profile, err = get_profile_from_cookie(request)
+    if err:
+        return err
+    if not profile.battery or not profile.battery_energy_capacity:
+        return jsonify({"error": "No battery configured for this user"}), 400
+
+    body = request.get_json(silent=True) or {}
+    arbitrage = body.get("arbitrage", False)
+    if not isinstance(arbitrage, bool):
+        return jsonify({"error": "'arbitrage' must be true or false"}), 400
+    try:
+        start, end, days = parse_days(body, BATTERY_MAX_DAYS)
+        unit = parse_energy_unit(body)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    try:
+        initial_soc = float(body.get("initial_soc", 0))
+    except (TypeError, ValueError):
+        initial_soc = None
+    if initial_soc is None or not 0 <= initial_soc <= 1:
+        return jsonify({"error": "'initial_soc' must be between 0 and 1"}), 400
+
+    try:
+        logging.info("Simulating battery from %s to %s (arbitrage: %s)", start, end, arbitrage)
+
+        data, err = get_energy_and_prices(request, start, days, profile.time_zone, with_prices=arbitrage)
+        if err:
+            return err
+        slots_per_day, production, consumption, spot_price = data
+        slot_minutes = 1440 // slots_per_day
+
+        surplus = ((production - consumption) * kwh_per_unit(unit, slot_minutes))[None, :]
+        result = {
+            name: values[0]
+            for name, values in simulate_battery(
+                surplus, [profile.battery_energy_capacity], slot_minutes, spot_price, initial_soc
+            ).items()
+        }
+        totals = {
+            "import_without_battery": float(np.maximum(-surplus, 0).sum()),
+            "export_without_battery": float(np.maximum(surplus, 0).sum()),
+            "grid_import": float(result["grid_import"].sum()),
+            "grid_export": float(result["grid_export"].sum()),
+            "charged": float(result["charge"].sum()),
+            "grid_charged": float(result["grid_charge"].sum()),
+            "discharged": float(result["discharge"].sum()),
+        }
+        totals = {name: round(value, 6) for name, value in totals.items()}
+        totals["equivalent_cycles"] = round(totals["discharged"] / profile.battery_energy_capacity, 3)
+
+        return jsonify({
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "timezone": profile.time_zone,
+            "freq": f"{slot_minutes}min",
+            "capacity": profile.battery_energy_capacity,
+            "arbitrage": arbitrage,
+            "unit": unit,
+            "soc": _json_values(result["soc"]),
+            "grid_import": _json_values(result["grid_import"]),
+            "grid_export": _json_values(result["grid_export"]),
+            "totals": totals
+        }), 200
+
+    except requests.exceptions.Timeout:
+        logging.error("Timeout connecting to register or entsoe service")
+        return jsonify({"error": "Upstream service timeout"}), 500
+    except requests.exceptions.ConnectionError as e:
+        logging.error("Connection error: %s", str(e))
+        return jsonify({"error": "Failed to connect to upstream service"}), 500
+    except Exception as error:
+        logging.error(f"Exception: {error}")
+        return jsonify({"error": str(error)}), 500
+
+
+@app.route("/processing/battery/batch", methods=["POST"])
+def battery_simulation_batch():
+    """Simulates the batteries of many sites (e.g. a community) at once.
+
+    Request body:
+        sites (list): Dicts with 'surplus' (one value per step in `unit`,
+            negative for deficit; same length for every site) and
+            'battery_energy_capacity' (kWh).
+        freq (str, optional): Step length between 1min and 1h. Defaults to 15min.
+        unit (str, optional): Unit of the surplus values (kWh, Wh, kW or W).
+            Defaults to REGISTER_ENERGY_UNIT.
+        prices (list, optional): One price per step, shared by all sites;
+            enables arbitrage. Steps are taken to start at midnight.
+        initial_soc (float, optional): Initial state of charge (0-1). Defaults to 0.
+
+    Returns:
+        JSON response with one row per site (request order) of soc,
+        grid_import and grid_export in kWh, or error message:
+        - 401 for missing/invalid cookie
+        - 400 for missing or invalid sites
+        - 500 for simulation errors
+        - 200 with the simulation on success
+    """
+    _, err = get_user_from_cookie(request)
+    if err:
+        return err
+
+    body = request.get_json(silent=True) or {}
+    sites = body.get("sites")
+    if not isinstance(sites, list) or not sites:
+        return jsonify({"error": "Missing 'sites' list"}), 400
+    if len(sites) > BATTERY_BATCH_MAX_SITES:
+        return jsonify({"error": f"Too many sites (max {BATTERY_BATCH_MAX_SITES})"}), 400
+
+    try:
+        _, _, freq = parse_period({"freq": body.get("freq")}, "UTC")
+        slot_minutes = int(freq[:-3])
+        unit = parse_energy_unit(body)
+        surplus = np.array([site["surplus"] for site in sites], dtype=float)
+        capacity = np.array([site["battery_energy_capacity"] for site in sites], dtype=float)
+        prices = np.array(body["prices"], dtype=float) if body.get("prices") is not None else None
+        initial_soc = float(body.get("initial_soc", 0))
+    except (KeyError, TypeError, ValueError) as error:
+        return jsonify({"error": f"Invalid sites or parameters: {error}"}), 400
+    if surplus.ndim != 2 or (capacity <= 0).any():
+        return jsonify({"error": "Sites need equally long 'surplus' lists and a positive capacity"}), 400
+    if not 0 <= initial_soc <= 1:
+        return jsonify({"error": "'initial_soc' must be between 0 and 1"}), 400
+    if surplus.shape[1] > BATTERY_MAX_DAYS * 1440 // slot_minutes:
+        return jsonify({"error": f"Too many steps (max {BATTERY_MAX_DAYS} days)"}), 400
+    if prices is not None and prices.shape != (surplus.shape[1],):
+        return jsonify({"error": "'prices' must have one value per step"}), 400
+
+    try:
+        logging.info("Simulating %d batteries over %d steps", *surplus.shape)
+
+        surplus *= kwh_per_unit(unit, slot_minutes)
+        result = simulate_battery(surplus, capacity, slot_minutes, prices, initial_soc)
+
+        return jsonify({
+            "freq": freq,
+            "count": len(sites),
+            "arbitrage": prices is not None,
+            "soc": [_json_values(row) for row in result["soc"]],
+            "grid_import": [_json_values(row) for row in result["grid_import"]],
+            "grid_export": [_json_values(row) for row in result["grid_export"]]
+        }), 200
+
+    except Exception as error:
+        logging.error(f"Exception: {error}")
+        return jsonify({"error": str(error)}), 500
+
+
+@app.cli.command("build-solar-index")
+@click.option("--bbox", required=True, help="Grid bounds as lat_min,lat_max,lon_min,lon_max.")
+@click.option("--step", default=0.05, show_default=True, help="Grid spacing in degrees.")
+@click.option("--tz", required=True, help="Timezone of the index (e.g., 'Europe/Madrid').")
+@click.option("--year", default=date.today().year, show_default=True, help="Year to precompute.")
+@click.option("--freq", default=PVGEN_DEFAULT_FREQ, show_default=True, help="Resolution.")
+@click.option("--altitude", default=0.0, show_default=True, help="Reference altitude in meters.")
+@click.option("--output", default=SOLAR_INDEX_DIR, show_default=True, help="Index directory.")
+def build_solar_index(bbox, step, tz, year, freq, altitude, output):
+    """Precomputes a year of solar geometry and clear-sky GHI for a grid.
+
+    Usage: flask --app app build-solar-index --bbox 40.5,42.9,0.1,3.4 --tz Europe/Madrid
+    """
+    lat_min, lat_max, lon_min, lon_max = (float(value) for value in bbox.split(","))
+    start, end, freq = parse_period({"start": f"{year}-01-01", "end": f"{year}-12-31", "freq": freq}, tz)
+    times = get_times(start, end, freq, tz)
+    latitudes = np.arange(lat_min, lat_max + step / 2, step)
+    longitudes = np.arange(lon_min, lon_max + step / 2, step)
+    shape = (len(latitudes), len(longitudes), len(times))
+    dni_extra = pvlib.irradiance.get_extra_radiation(times).to_numpy()
+
+    # Build next to the live index and swap files at the end, so running
+    # workers keep reading their (unlinked) mapped files until restarted.
+    staging = output.rstrip("/") + ".tmp"
+    os.makedirs(staging, exist_ok=True)
+    epochs = times.tz_convert("UTC").tz_localize(None).to_numpy().astype("datetime64[s]").astype(np.int64)
+    np.save(os.path.join(staging, "times.npy"), epochs)
+    arrays = {
+        name: np.lib.format.open_memmap(os.path.join(staging, f"{name}.npy"), mode="w+", dtype=np.float32, shape=shape)
+        for name in SolarIndex.ARRAYS
+    }
+
+    click.echo(f"Building {shape[0]}x{shape[1]} cells x {shape[2]} timestamps into {output}")
+    for row, latitude in enumerate(latitudes):
+        for col, longitude in enumerate(longitudes):
+            location = pvlib.location.Location(latitude, longitude, tz=tz, altitude=altitude)
+            solar_position = location.get_solarposition(times)
+            airmass = location.get_airmass(solar_position=solar_position)
+            linke_turbidity = pvlib.clearsky.lookup_linke_turbidity(times, latitude, longitude)
+            clearsky = pvlib.clearsky.ineichen(
+                solar_position["apparent_zenith"],
+                airmass["airmass_absolute"],
+                linke_turbidity,
+                altitude=altitude,
+                dni_extra=dni_extra,
+            )
+            arrays["apparent_zenith"][row, col] = solar_position["apparent_zenith"].to_numpy()
+            arrays["airmass_relative"][row, col] = airmass["airmass_relative"].to_numpy()
+            arrays["linke_turbidity"][row, col] = linke_turbidity.to_numpy()
+            arrays["ghi"][row, col] = np.nan_to_num(clearsky["ghi"].to_numpy())
+        click.echo(f"  row {row + 1}/{shape[0]} (lat {latitude:.3f})")
+
+    for array in arrays.values():
+        array.flush()
+    with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as file:
+        json.dump({
+            "lat_min": float(latitudes[0]),
+            "lon_min": float(longitudes[0]),
+            "step": step,
+            "n_lat": shape[0],
+            "n_lon": shape[1],
+            "tz": tz,
+            "year": year,
+            "freq": freq,
+            "altitude": altitude,
+        }, file)
+
+    os.makedirs(output, exist_ok=True)
+    # meta.json goes last so a half-swapped index is never picked up
+    for name in sorted(os.listdir(staging), key=lambda name: name == "meta.json"):
+        os.replace(os.path.join(staging, name), os.path.join(output, name))
+    shutil.rmtree(staging)
+    click.echo("Solar index built; restart the service to load it")
+
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5005)
\ No newline at end of file
+    serve(app, port=5005)
\ No newline at end of file
@@ -1,9 +1,16 @@
 import os
+import io
+import csv
 import redis
 import json
+import math
+import time
+import click
+import numpy as np
 from flask import Flask, request, jsonify
-from itsdangerous import URLSafeSerializer
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
+
+from common.auth import get_user_profile, load_user_profile
 
 app = Flask(__name__)
 
@@ -11,106 +18,640 @@ app = Flask(__name__)
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "default_secret_key")
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
-
-# Initialize serializer and Redis
-serializer = URLSafeSerializer(app.config["SECRET_KEY"], salt="user-cookie")
+BULK_MAX_ENTRIES = int(os.getenv("BULK_MAX_ENTRIES", 100000))
+KNOWN_USERS_TTL_SECONDS = int(os.getenv("KNOWN_USERS_TTL_SECONDS", 300))
+KNOWN_USERS_MAX = int(os.getenv("KNOWN_USERS_MAX", 100000))
+RANGE_MAX_DAYS = int(os.getenv("RANGE_MAX_DAYS", 3660))
+RANGE_MAX_HOURLY_DAYS = int(os.getenv("RANGE_MAX_HOURLY_DAYS", 92))
+GET_DAY_MAX_DAYS = int(os.getenv("GET_DAY_MAX_DAYS", 366))  # covers processing's year-long simulations
+REGISTER_STORAGE_FORMAT = os.getenv("REGISTER_STORAGE_FORMAT", "hash")  # "hash" or "binary"
+REGISTER_SLOTS_PER_DAY = int(os.getenv("REGISTER_SLOTS_PER_DAY", 24))  # binary only: 24 (hourly) or 96 (15 min)
+
+# Initialize Redis
 redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+# Day arrays are raw bytes, so the binary format needs an undecoded connection
+redis_raw_client = (
+    redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=False)
+    if REGISTER_STORAGE_FORMAT == "binary" else None
+)
+
+
+# Atomic upsert of hours of one day: sets the new values, returns the previous
+# ones (or nil) and adds the difference to the daily and monthly rollups, all
+# in one server-side step, so concurrent writers never interleave a read and a
+# write and the rollups always match the stored hours.
+#   KEYS: day hash, daily rollup hash, monthly rollup hash
+#   ARGV: day, month, hour1, value1, hour2, value2, ...
+UPSERT_HOURS_LUA = """
+local previous = {}
+local delta = 0
+for i = 3, #ARGV, 2 do
+    local old = redis.call('HGET', KEYS[1], ARGV[i])
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    delta = delta + (tonumber(ARGV[i + 1]) or 0) - (tonumber(old) or 0)
+    previous[#previous + 1] = old
+end
+if delta ~= 0 then
+    redis.call('HINCRBYFLOAT', KEYS[2], ARGV[1], delta)
+    redis.call('HINCRBYFLOAT', KEYS[3], ARGV[2], delta)
+end
+return previous
+"""
+
+# Same contract as UPSERT_HOURS_LUA for the binary format, where a day is a
+# string of little-endian float32 slots and NaN marks a missing reading. The
+# day is created NaN-filled on first write and each slot is rewritten in place
+# with SETRANGE. With only_missing set, slots that already hold a value are
+# left untouched (used by the migration).
+#   KEYS: day string, daily rollup hash, monthly rollup hash
+#   ARGV: day, month, empty day, only_missing (0/1), slot1, packed value1, ...
+UPSERT_SLOTS_LUA = """
+local blob = redis.call('GET', KEYS[1])
+if not blob then
+    blob = ARGV[3]
+    redis.call('SET', KEYS[1], blob)
+end
+local previous = {}
+local delta = 0
+for i = 5, #ARGV, 2 do
+    local offset = tonumber(ARGV[i]) * 4
+    local old = struct.unpack('<f', blob, offset + 1)
+    local missing = old ~= old
+    if ARGV[4] == '0' or missing then
+        redis.call('SETRANGE', KEYS[1], offset, ARGV[i + 1])
+        delta = delta + struct.unpack('<f', ARGV[i + 1]) - (missing and 0 or old)
+    end
+    if missing then
+        previous[#previous + 1] = false
+    else
+        previous[#previous + 1] = tostring(old)
+    end
+end
+if delta ~= 0 then
+    redis.call('HINCRBYFLOAT', KEYS[2], ARGV[1], delta)
+    redis.call('HINCRBYFLOAT', KEYS[3], ARGV[2], delta)
+end
+return previous
+"""
 
 
 class RedisModel:
-    """A model for managing user data in Redis."""
+    """A model for managing user data in Redis.
+
+    Layout:
+        user:{email}                 hash with email and created_at
+        user:{email}:{field}:{day}   hash hour -> JSON value, one per day
+        rollup:{email}:{field}:day   hash day -> sum of the day's values
+        rollup:{email}:{field}:month hash YYYY-MM -> sum of the month's values
+
+    so writing one hour is a single O(1) script call, reading a day touches
+    only that day and range totals are served from the rollups. Users
+    stored with the former layout (whole history as JSON blobs in the
+    production/consumption fields of user:{email}) are migrated on first
+    access, or in bulk with the migrate-storage command.
+    """
+
+    FIELDS = ("production", "consumption")
 
     def __init__(self, redis_conn):
         self.redis = redis_conn
+        self._upsert_hours = redis_conn.register_script(UPSERT_HOURS_LUA)
+        # email -> expiry (monotonic) of users already provisioned/migrated
+        self._known_users = {}
 
     def get_user_email_from_cookie(self, cookie_value):
-        """Deserialize cookie and extract user email."""
-        try:
-            data = serializer.loads(cookie_value)
-            return data.get("email")
-        except Exception as e:
-            raise ValueError(f"Invalid cookie: {str(e)}")
+        """Verify the cookie (cached, see common.auth) and extract user email."""
+        return load_user_profile(cookie_value).email
+
+    @staticmethod
+    def _day_key(user_email: str, field: str, day: str) -> str:
+        return f"user:{user_email}:{field}:{day}"
+
+    @staticmethod
+    def _rollup_key(user_email: str, field: str, granularity: str) -> str:
+        return f"rollup:{user_email}:{field}:{granularity}"
+
+    def _upsert_keys(self, user_email: str, field: str, day: str) -> list:
+        return [
+            self._day_key(user_email, field, day),
+            self._rollup_key(user_email, field, "day"),
+            self._rollup_key(user_email, field, "month"),
+        ]
+
+    def ensure_user(self, user_email: str) -> None:
+        """Provision (and migrate, if needed) a user at most once per TTL.
+
+        Users seen recently by this process cost nothing. Otherwise a single
+        pipelined round trip creates the user hash with HSETNX (a no-op for
+        existing users) and checks for legacy history blobs to migrate.
+        """
+        now = time.monotonic()
+        if self._known_users.get(user_email, 0) > now:
+            return
 
-    def create_user_if_not_exists(self, user_email: str) -> dict:
-        """Create user entry in Redis if it doesn't exist."""
         user_key = f"user:{user_email}"
-        if not self.redis.exists(user_key):
-            user_data = {
-                "email": user_email,
-                "created_at": datetime.now(timezone.utc).isoformat(),
-                # store production/consumption as JSON strings
-                "production": json.dumps({}),
-                "consumption": json.dumps({}),
-            }
-            self.redis.hset(user_key, mapping=user_data)
-        return self.get_user_data(user_email)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hsetnx(user_key, "email", user_email)
+        pipe.hsetnx(user_key, "created_at", datetime.now(timezone.utc).isoformat())
+        pipe.hmget(user_key, list(self.FIELDS))
+        _, _, legacy = pipe.execute()
+        if any(raw is not None for raw in legacy):
+            self.migrate_user(user_email, dict(zip(self.FIELDS, legacy)))
+
+        if len(self._known_users) >= KNOWN_USERS_MAX:
+            self._known_users.clear()
+        self._known_users[user_email] = now + KNOWN_USERS_TTL_SECONDS
 
     def get_user_data(self, user_email: str) -> dict:
-        """Retrieve user data from Redis."""
+        """Retrieve user data (email and creation date) from Redis."""
         user_key = f"user:{user_email}"
         data = self.redis.hgetall(user_key)
-        if not data:
-            return None
+        return data or None
+
+    def _load_legacy(self, user_email: str, data: dict = None) -> dict:
+        """Return the decoded legacy history blobs of a user, keyed by field."""
+        if data is None:
+            data = dict(zip(self.FIELDS, self.redis.hmget(f"user:{user_email}", list(self.FIELDS))))
+        legacy = {}
+        for field in self.FIELDS:
+            if data.get(field) is None:
+                continue
+            try:
+                legacy[field] = json.loads(data[field]) if data[field] else {}
+            except json.JSONDecodeError:
+                legacy[field] = {}
+        return legacy
+
+    def migrate_user(self, user_email: str, data: dict = None) -> bool:
+        """Convert a user's JSON history blobs into per-day hashes.
+
+        Uses HSETNX so that hours written with the new layout while the
+        migration runs are never overwritten; running it twice is harmless.
+        Only the hours actually inserted are added to the rollups, and since
+        rollups are maintained by deltas the result is exact even if a writer
+        updates one of those hours in between.
+
+        Returns:
+            True if legacy data was found and migrated.
+        """
+        legacy = self._load_legacy(user_email, data)
+        if not legacy:
+            return False
 
-        # Parse JSON fields
-        for key in ["production", "consumption"]:
-            if key in data and isinstance(data[key], str):
-                try:
-                    data[key] = json.loads(data[key])
-                except json.JSONDecodeError:
-                    data[key] = {}
-        return data
-
-    # Generic helpers for day/hour storage
-    def _get_field(self, user_email: str, field: str) -> dict:
         user_key = f"user:{user_email}"
-        raw = self.redis.hget(user_key, field)
-        return json.loads(raw) if raw else {}
+        pipe = self.redis.pipeline(transaction=True)
+        inserted = []
+        for field, payload in legacy.items():
+            for day, day_list in payload.items():
+                day_key = self._day_key(user_email, field, day)
+                for item in day_list:
+                    pipe.hsetnx(day_key, str(item.get("hour")), json.dumps(item.get("value")))
+                    inserted.append((field, day, item.get("value")))
+        pipe.hdel(user_key, *legacy.keys())
+        results = pipe.execute()
+
+        totals = {}
+        for (field, day, value), was_set in zip(inserted, results):
+            if was_set and isinstance(value, (int, float)):
+                totals[(field, day)] = totals.get((field, day), 0) + value
+        pipe = self.redis.pipeline(transaction=True)
+        for (field, day), total in totals.items():
+            pipe.hincrbyfloat(self._rollup_key(user_email, field, "day"), day, total)
+            pipe.hincrbyfloat(self._rollup_key(user_email, field, "month"), day[:7], total)
+        pipe.execute()
+        return True
+
+    def _parse_day_key(self, key: str):
+        """(user_email, field, day) of a day key, or None for other keys."""
+        parts = key.split(":")
+        if len(parts) != 4 or parts[0] != "user" or parts[2] not in self.FIELDS:
+            return None
+        return parts[1], parts[2], parts[3]
+
+    def scan_user_days(self) -> dict:
+        """Stored days of every user, grouped in a single keyspace scan.
+
+        Returns:
+            Dict user_email -> {field: [day, ...]} covering every user key
+            and every user with stored days.
+        """
+        users = {}
+        for key in self.redis.scan_iter(match="user:*", count=1000):
+            parsed = self._parse_day_key(key)
+            user_email = key.split(":", 1)[1] if key.count(":") == 1 else parsed and parsed[0]
+            if not user_email:
+                continue
+            days = users.setdefault(user_email, {field: [] for field in self.FIELDS})
+            if parsed:
+                days[parsed[1]].append(parsed[2])
+        return users
+
+    def _stored_days(self, user_email: str, field: str) -> list:
+        """Days stored for one user and field (scans the user's keys)."""
+        prefix = RedisModel._day_key(user_email, field, "")
+        days = []
+        for day_key in self.redis.scan_iter(match=f"{prefix}*", count=1000):
+            parsed = self._parse_day_key(day_key)
+            if parsed:
+                days.append(parsed[2])
+        return days
+
+    def rebuild_rollups(self, user_email: str, days: dict = None) -> None:
+        """Recompute a user's daily and monthly rollups from the day hashes.
+
+        Args:
+            user_email: The user.
+            days: Optional {field: [day, ...]} from scan_user_days; when
+                omitted the user's days are scanned for.
+        """
+        for field in self.FIELDS:
+            daily, monthly = {}, {}
+            for day in days[field] if days is not None else self._stored_days(user_email, field):
+                day_key = self._day_key(user_email, field, day)
+                total = 0
+                for value in self.redis.hvals(day_key):
+                    value = json.loads(value)
+                    if isinstance(value, (int, float)):
+                        total += value
+                daily[day] = total
+                monthly[day[:7]] = monthly.get(day[:7], 0) + total
+
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.delete(self._rollup_key(user_email, field, "day"), self._rollup_key(user_email, field, "month"))
+            if daily:
+                pipe.hset(self._rollup_key(user_email, field, "day"), mapping=daily)
+                pipe.hset(self._rollup_key(user_email, field, "month"), mapping=monthly)
+            pipe.execute()
+
+    @staticmethod
+    def _decode_day(raw: dict) -> list:
+        """Convert a day hash into the [{"hour", "value"}] list ordered by hour."""
+        day_list = [{"hour": hour, "value": json.loads(value)} for hour, value in raw.items()]
+        try:
+            day_list.sort(key=lambda x: int(x["hour"]))
+        except Exception:
+            pass
+        return day_list
 
-    def _save_field(self, user_email: str, field: str, payload: dict) -> None:
-        user_key = f"user:{user_email}"
-        self.redis.hset(user_key, field, json.dumps(payload))
+    def add_entry(self, user_email: str, field: str, day: str, hour: str, value):
+        """Add or update a single hour entry for a given day in the specified field.
 
-    def add_entry(self, user_email: str, field: str, day: str, hour: str, value) -> None:
-        """Add or update a single hour entry for a given day in the specified field."""
-        payload = self._get_field(user_email, field)
+        Returns:
+            The value previously stored for that hour, or None.
+        """
         day = str(day)
-        hour = str(hour)
-        day_list = payload.get(day, [])
-        # Replace existing hour entry if present
-        replaced = False
-        for item in day_list:
-            if str(item.get("hour")) == hour:
-                item["value"] = value
-                replaced = True
-                break
-        if not replaced:
-            day_list.append({"hour": hour, "value": value})
-            # Optional: keep list ordered by hour
-            try:
-                day_list.sort(key=lambda x: int(x["hour"]))
-            except Exception:
-                pass
-        payload[day] = day_list
-        self._save_field(user_email, field, payload)
+        previous, = self._upsert_hours(
+            keys=self._upsert_keys(user_email, field, day),
+            args=[day, day[:7], str(hour), json.dumps(value)]
+        )
+        return json.loads(previous) if previous is not None else None
+
+    def add_entries(self, user_email: str, entries: list) -> None:
+        """Add or update many (field, day, hour, value) entries atomically.
+
+        Entries are grouped into one upsert script call per day and sent in a
+        single MULTI/EXEC pipeline, so a backfill costs one round trip.
+        """
+        mappings = {}
+        for field, day, hour, value in entries:
+            mappings.setdefault((field, str(day)), {})[str(hour)] = json.dumps(value)
+
+        pipe = self.redis.pipeline(transaction=True)
+        for (field, day), mapping in mappings.items():
+            args = [day, day[:7]]
+            for hour, value in mapping.items():
+                args.extend((hour, value))
+            self._upsert_hours(keys=self._upsert_keys(user_email, field, day), args=args, client=pipe)
+        pipe.execute()
 
     def get_day(self, user_email: str, field: str, day: str) -> list:
-        payload = self._get_field(user_email, field)
-        return payload.get(str(day), [])
+        day_key = self._day_key(user_email, field, str(day))
+        return self._decode_day(self.redis.hgetall(day_key))
+
+    def get_days(self, user_email: str, days: list) -> dict:
+        """Retrieve production and consumption for several days in one round trip."""
+        pipe = self.redis.pipeline(transaction=False)
+        for day in days:
+            for field in self.FIELDS:
+                pipe.hgetall(self._day_key(user_email, field, str(day)))
+        results = iter(pipe.execute())
+        return {
+            str(day): {field: self._decode_day(next(results)) for field in self.FIELDS}
+            for day in days
+        }
+
+    def _hourly_series(self, user_email: str, days: list) -> dict:
+        """Read 24 values per day and field for the given days (None if missing)."""
+        pipe = self.redis.pipeline(transaction=False)
+        for day in days:
+            for field in self.FIELDS:
+                pipe.hgetall(self._day_key(user_email, field, day.isoformat()))
+        results = iter(pipe.execute())
+        series = {field: [] for field in self.FIELDS}
+        for day in days:
+            for field in self.FIELDS:
+                raw = next(results)
+                values = [None] * 24
+                for hour, value in raw.items():
+                    try:
+                        values[int(hour)] = json.loads(value)
+                    except (ValueError, IndexError):
+                        continue
+                series[field].extend(values)
+        return series
+
+    def get_range(self, user_email: str, start: date, end: date, granularity: str) -> dict:
+        """Aggregate production and consumption over [start, end] (inclusive).
+
+        'hour' reads the day hashes; 'day', 'week' and 'month' are answered
+        from the rollups, using monthly totals for full months and daily
+        totals for the partial months at the edges. Every granularity costs a
+        single pipelined round trip.
+
+        Returns:
+            Dict with 'labels' and one value list per field, aligned with the
+            labels ('YYYY-MM-DDTHH', 'YYYY-MM-DD', 'YYYY-Www' or 'YYYY-MM').
+            Hours without a reading are None.
+        """
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+        if granularity == "hour":
+            labels = [f"{day.isoformat()}T{hour:02d}" for day in days for hour in range(24)]
+            return {"labels": labels, **self._hourly_series(user_email, days)}
+
+        def is_full_month(month: str) -> bool:
+            first = date.fromisoformat(f"{month}-01")
+            last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            return start <= first and last <= end
+
+        pipe = self.redis.pipeline(transaction=False)
+        months = sorted({day.isoformat()[:7] for day in days})
+        full_months = [month for month in months if is_full_month(month)] if granularity == "month" else []
+        daily_days = [day.isoformat() for day in days if day.isoformat()[:7] not in full_months]
+
+        for field in self.FIELDS:
+            if daily_days:
+                pipe.hmget(self._rollup_key(user_email, field, "day"), daily_days)
+            if full_months:
+                pipe.hmget(self._rollup_key(user_email, field, "month"), full_months)
+        results = iter(pipe.execute())
+
+        buckets = {}
+        for field in self.FIELDS:
+            daily = dict(zip(daily_days, next(results))) if daily_days else {}
+            monthly = dict(zip(full_months, next(results))) if full_months else {}
+            for day in days:
+                iso = day.isoformat()
+                if granularity == "day":
+                    label = iso
+                elif granularity == "week":
+                    year, week, _ = day.isocalendar()
+                    label = f"{year}-W{week:02d}"
+                else:
+                    label = iso[:7]
+                bucket = buckets.setdefault(label, {name: 0.0 for name in self.FIELDS})
+                if iso in daily:
+                    bucket[field] += float(daily[iso] or 0)
+            for month, total in monthly.items():
+                buckets[month][field] += float(total or 0)
+
+        labels = list(buckets)
+        return {
+            "labels": labels,
+            **{field: [buckets[label][field] for label in labels] for field in self.FIELDS}
+        }
+
+
+class BinaryRedisModel(RedisModel):
+    """RedisModel variant storing each day as a packed float32 array.
+
+    Layout (user hashes and rollups are the same as RedisModel):
+        user:{email}:{field}:{day}:f32   slots_per_day little-endian float32,
+                                         NaN where there is no reading
+
+    A day costs 96 bytes at hourly resolution (384 with 15 min slots) instead
+    of a hash of JSON strings, and is decoded zero-copy with np.frombuffer.
+    Readings are addressed by hour ("7" or "07:00") or, with 96 slots, by
+    "HH:MM" on a quarter hour; values must be numbers and are kept as float32.
+    """
+
+    DTYPE = np.dtype("<f4")
+
+    def __init__(self, redis_conn, raw_conn, slots_per_day: int = 24):
+        super().__init__(redis_conn)
+        if slots_per_day not in (24, 96):
+            raise ValueError("slots_per_day must be 24 or 96")
+        self.raw = raw_conn
+        self.slots_per_day = slots_per_day
+        self._empty_day = np.full(slots_per_day, np.nan, dtype=self.DTYPE).tobytes()
+        self._upsert_slots = raw_conn.register_script(UPSERT_SLOTS_LUA)
+
+    @staticmethod
+    def _day_key(user_email: str, field: str, day: str) -> str:
+        return f"user:{user_email}:{field}:{day}:f32"
+
+    def _slot(self, hour) -> int:
+        """Map an hour ("7", 7, "07:00" or "07:45") to its slot index."""
+        minutes_per_slot = 1440 // self.slots_per_day
+        hours, _, minutes = str(hour).partition(":")
+        try:
+            offset = int(hours) * 60 + (int(minutes) if minutes else 0)
+        except ValueError:
+            raise ValueError(f"Invalid hour '{hour}'")
+        if not 0 <= offset < 1440 or offset % minutes_per_slot:
+            raise ValueError(f"Invalid hour '{hour}' for {self.slots_per_day} slots per day")
+        return offset // minutes_per_slot
+
+    def _label(self, slot: int) -> str:
+        if self.slots_per_day == 24:
+            return str(slot)
+        offset = slot * (1440 // self.slots_per_day)
+        return f"{offset // 60:02d}:{offset % 60:02d}"
+
+    def _pack(self, value) -> bytes:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"Value must be a number, got {value!r}")
+        try:
+            with np.errstate(over="ignore"):
+                packed = np.array(value, dtype=self.DTYPE)
+        except OverflowError:
+            packed = np.array(np.inf, dtype=self.DTYPE)
+        # Checked after the cast: values beyond the float32 range become inf
+        if not np.isfinite(packed):
+            raise ValueError(f"Value must be a finite {self.DTYPE.name} number, got {value!r}")
+        return packed.tobytes()
+
+    @staticmethod
+    def _to_list(values: np.ndarray) -> list:
+        """Convert float32 values to floats as written (shortest repr), NaN to None."""
+        return [None if text == "nan" else float(text) for text in values.astype(str)]
+
+    def _decode_blob(self, blob) -> np.ndarray:
+        if not blob:
+            return np.frombuffer(self._empty_day, dtype=self.DTYPE)
+        return np.frombuffer(blob, dtype=self.DTYPE)
+
+    def _decode_day(self, blob) -> list:
+        values = self._decode_blob(blob)
+        present = np.flatnonzero(~np.isnan(values))
+        return [
+            {"hour": self._label(slot), "value": value}
+            for slot, value in zip(present.tolist(), self._to_list(values[present]))
+        ]
+
+    def _upsert(self, user_email: str, field: str, day: str, mapping: dict,
+                only_missing: bool = False, client=None) -> list:
+        args = [day, day[:7], self._empty_day, int(only_missing)]
+        for slot, value in mapping.items():
+            args.extend((slot, value))
+        return self._upsert_slots(
+            keys=self._upsert_keys(user_email, field, day), args=args, client=client
+        )
+
+    def migrate_user(self, user_email: str, data: dict = None) -> bool:
+        """Convert a user's JSON history blobs into per-day arrays.
+
+        Slots that already hold a reading are kept, and the script adds only
+        the inserted values to the rollups. Non-numeric values and hours that
+        do not fit the slot grid are dropped.
+        """
+        legacy = self._load_legacy(user_email, data)
+        if not legacy:
+            return False
+
+        pipe = self.raw.pipeline(transaction=True)
+        for field, payload in legacy.items():
+            for day, day_list in payload.items():
+                mapping = {}
+                for item in day_list:
+                    try:
+                        mapping[self._slot(item.get("hour"))] = self._pack(item.get("value"))
+                    except ValueError:
+                        continue
+                if mapping:
+                    self._upsert(user_email, field, day, mapping, only_missing=True, client=pipe)
+        pipe.hdel(f"user:{user_email}", *legacy.keys())
+        pipe.execute()
+        return True
+
+    def convert_day_hashes(self, user_email: str) -> int:
+        """Move a user's per-day hashes (hash format) into per-day arrays.
+
+        Readings already written as arrays win over the hash values, and the
+        rollups are rebuilt afterwards.
+
+        Returns:
+            Number of day hashes converted.
+        """
+        converted = 0
+        for field in self.FIELDS:
+            prefix = RedisModel._day_key(user_email, field, "")
+            for day_key in self.redis.scan_iter(match=f"{prefix}*", count=1000):
+                day = day_key[len(prefix):]
+                if ":" in day:
+                    continue
+                mapping = {}
+                for hour, value in self.redis.hgetall(day_key).items():
+                    try:
+                        mapping[self._slot(hour)] = self._pack(json.loads(value))
+                    except ValueError:
+                        continue
+                pipe = self.raw.pipeline(transaction=True)
+                if mapping:
+                    self._upsert(user_email, field, day, mapping, only_missing=True, client=pipe)
+                pipe.delete(day_key)
+                pipe.execute()
+                converted += 1
+        if converted:
+            self.rebuild_rollups(user_email)
+        return converted
+
+    def _parse_day_key(self, key: str):
+        parts = key.split(":")
+        if len(parts) != 5 or parts[4] != "f32":
+            return None
+        return super()._parse_day_key(":".join(parts[:4]))
+
+    def rebuild_rollups(self, user_email: str, days: dict = None) -> None:
+        """Recompute a user's daily and monthly rollups from the day arrays."""
+        for field in self.FIELDS:
+            field_days = days[field] if days is not None else self._stored_days(user_email, field)
+            keys = [self._day_key(user_email, field, day) for day in field_days]
+            blobs = self.raw.mget(keys) if keys else []
+
+            daily, monthly = {}, {}
+            for day, blob in zip(field_days, blobs):
+                total = float(np.nansum(self._decode_blob(blob), dtype=np.float64))
+                daily[day] = total
+                monthly[day[:7]] = monthly.get(day[:7], 0) + total
+
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.delete(self._rollup_key(user_email, field, "day"), self._rollup_key(user_email, field, "month"))
+            if daily:
+                pipe.hset(self._rollup_key(user_email, field, "day"), mapping=daily)
+                pipe.hset(self._rollup_key(user_email, field, "month"), mapping=monthly)
+            pipe.execute()
+
+    def add_entry(self, user_email: str, field: str, day: str, hour: str, value):
+        """Add or update a single reading; returns the previous value or None."""
+        day = str(day)
+        previous, = self._upsert(user_email, field, day, {self._slot(hour): self._pack(value)})
+        return float(previous) if previous is not None else None
 
+    def add_entries(self, user_email: str, entries: list) -> None:
+        """Add or update many (field, day, hour, value) entries atomically."""
+        mappings = {}
+        for field, day, hour, value in entries:
+            mappings.setdefault((field, str(day)), {})[self._slot(hour)] = self._pack(value)
 
-redis_model = RedisModel(redis_client)
+        pipe = self.raw.pipeline(transaction=True)
+        for (field, day), mapping in mappings.items():
+            self._upsert(user_email, field, day, mapping, client=pipe)
+        pipe.execute()
+
+    def get_day(self, user_email: str, field: str, day: str) -> list:
+        return self._decode_day(self.raw.get(self._day_key(user_email, field, str(day))))
+
+    def get_days(self, user_email: str, days: list) -> dict:
+        """Retrieve production and consumption for several days in one MGET."""
+        keys = [self._day_key(user_email, field, str(day)) for day in days for field in self.FIELDS]
+        results = iter(self.raw.mget(keys))
+        return {
+            str(day): {field: self._decode_day(next(results)) for field in self.FIELDS}
+            for day in days
+        }
+
+    def _hourly_series(self, user_email: str, days: list) -> dict:
+        """Hourly values per field; 15 min slots are summed into their hour."""
+        series = {}
+        for field in self.FIELDS:
+            blobs = self.raw.mget([self._day_key(user_email, field, day.isoformat()) for day in days])
+            values = np.concatenate([self._decode_blob(blob) for blob in blobs])
+            hours = values.reshape(-1, self.slots_per_day // 24)
+            totals = np.nansum(hours, axis=1)
+            totals[np.isnan(hours).all(axis=1)] = np.nan
+            series[field] = self._to_list(totals)
+        return series
+
+
+if REGISTER_STORAGE_FORMAT == "binary":
+    redis_model = BinaryRedisModel(redis_client, redis_raw_client, REGISTER_SLOTS_PER_DAY)
+else:
+    redis_model = RedisModel(redis_client)
 
 
 def get_user_from_cookie(req):
-    """Extract and validate user email from cookie."""
-    cookie = req.cookies.get("user_data")
-    if not cookie:
+    """Extract and validate user email from cookie (or internal identity header)."""
+    try:
+        profile = get_user_profile(req)
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 401)
+    if profile is None:
         return None, (jsonify({"error": "Authentication required"}), 401)
 
     try:
-        user_email = redis_model.get_user_email_from_cookie(cookie)
-        redis_model.create_user_if_not_exists(user_email)
+        user_email = profile.email
+        redis_model.ensure_user(user_email)
         return user_email, None
     except Exception as e:
         return None, (jsonify({"error": str(e)}), 401)
@@ -120,6 +661,84 @@ def _current_day_iso():
     return datetime.now(timezone.utc).date().isoformat()
 
 
+def _parse_value(value):
+    """Validate a reading: a finite number, numeric strings are converted.
+
+    Raises:
+        ValueError: If the value is not a number, or is NaN or infinite.
+    """
+    if isinstance(value, str):
+        value = float(value)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Value must be a number, got {value!r}")
+    try:
+        finite = math.isfinite(value)
+    except OverflowError:
+        finite = False
+    if not finite:
+        raise ValueError(f"Value must be finite, got {value!r}")
+    return value
+
+
+def _parse_bulk_entries(req) -> list:
+    """Parse and validate the body of a bulk upload into (field, day, hour, value).
+
+    Accepted bodies:
+        application/json: {"day": default day, "production": [{"day", "hour",
+            "value"}], "consumption": [...]}
+        text/csv: header "field,day,hour,value", one reading per row
+        application/x-ndjson: one {"field", "day", "hour", "value"} per line
+
+    Raises:
+        ValueError: If the body is malformed or any entry is invalid; nothing
+            is written in that case.
+    """
+    if req.mimetype == "text/csv":
+        rows = list(csv.DictReader(io.StringIO(req.get_data(as_text=True))))
+    elif req.mimetype in ("application/x-ndjson", "application/jsonl"):
+        rows = [json.loads(line) for line in req.get_data(as_text=True).splitlines() if line.strip()]
+    else:
+        body = req.get_json(silent=True)
+        if not isinstance(body, dict):
+            raise ValueError("Body must be a JSON object, CSV or NDJSON")
+        default_day = body.get("day", _current_day_iso())
+        rows = []
+        for field in RedisModel.FIELDS:
+            items = body.get(field, [])
+            if not isinstance(items, list):
+                raise ValueError(f"'{field}' must be a list")
+            for j, item in enumerate(items):
+                if not isinstance(item, dict):
+                    raise ValueError(f"'{field}' entry {j}: must be an object")
+                # The list an item is in decides its field
+                rows.append({"day": default_day, **item, "field": field})
+
+    if not rows:
+        raise ValueError("No entries in payload")
+    if len(rows) > BULK_MAX_ENTRIES:
+        raise ValueError(f"Too many entries (max {BULK_MAX_ENTRIES})")
+
+    entries = []
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ValueError(f"Entry {i}: must be an object")
+        field = row.get("field")
+        day = row.get("day")
+        hour = row.get("hour")
+        value = row.get("value")
+        if field not in RedisModel.FIELDS:
+            raise ValueError(f"Entry {i}: 'field' must be one of {', '.join(RedisModel.FIELDS)}")
+        if hour is None or hour == "" or value is None or value == "":
+            raise ValueError(f"Entry {i}: missing 'hour' or 'value'")
+        try:
+            day = date.fromisoformat(str(day)).isoformat()
+            value = _parse_value(value)
+        except ValueError:
+            raise ValueError(f"Entry {i}: invalid 'day' or 'value'")
+        entries.append((field, day, str(hour), value))
+    return entries
+
+
 @app.route("/register/get_production_day", methods=["POST"])
 def get_production_day():
     """Retrieve production data for authenticated user for a given day (or today)."""
@@ -136,6 +755,43 @@ def get_production_day():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/register/get_day", methods=["POST"])
+def get_day():
+    """Retrieve production and consumption data together for one or more days.
+
+    Request body:
+        day (str, optional): Date in ISO format (YYYY-MM-DD). Defaults to today.
+        days (list, optional): Several dates (at most GET_DAY_MAX_DAYS);
+            takes precedence over 'day'.
+    """
+    user_email, err = get_user_from_cookie(request)
+    if err:
+        return err
+
+    try:
+        body = request.get_json(silent=True) or {}
+        days = body.get("days")
+        if days is not None:
+            if not isinstance(days, list) or not days:
+                return jsonify({"error": "'days' must be a non-empty list"}), 400
+            if len(days) > GET_DAY_MAX_DAYS:
+                return jsonify({"error": f"Too many days (max {GET_DAY_MAX_DAYS})"}), 400
+            try:
+                days = [date.fromisoformat(day).isoformat() for day in days]
+            except (TypeError, ValueError):
+                return jsonify({"error": "'days' must be dates in YYYY-MM-DD format"}), 400
+            data = redis_model.get_days(user_email, days)
+            return jsonify({
+                "days": [{"day": day, **values} for day, values in data.items()]
+            }), 200
+
+        day = body.get("day", _current_day_iso())
+        data = redis_model.get_days(user_email, [day])[str(day)]
+        return jsonify({"day": day, **data}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/register/set_production_day", methods=["POST"])
 def set_production_day():
     """Save a single production entry (day + hour + value) for authenticated user."""
@@ -150,9 +806,89 @@ def set_production_day():
         value = body.get("value")
         if hour is None or value is None:
             return jsonify({"error": "Missing 'hour' or 'value' in payload"}), 400
+        value = _parse_value(value)
+
+        previous = redis_model.add_entry(user_email, "production", day, hour, value)
+        return jsonify({
+            "status": "saved",
+            "day": day,
+            "hour": str(hour),
+            "replaced": previous is not None
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/register/range", methods=["POST"])
+def get_range():
+    """Aggregate production and consumption over a date range.
+
+    Request body:
+        from (str): First day in ISO format (YYYY-MM-DD).
+        to (str, optional): Last day (inclusive). Defaults to 'from'.
+        granularity (str, optional): 'hour', 'day' (default), 'week' or 'month'.
+
+    Returns:
+        JSON response with aligned 'labels', 'production' and 'consumption'
+        lists or error message (400 for invalid parameters).
+    """
+    user_email, err = get_user_from_cookie(request)
+    if err:
+        return err
+
+    body = request.get_json(silent=True) or {}
+    granularity = body.get("granularity", "day")
+    try:
+        start = date.fromisoformat(str(body.get("from")))
+        end = date.fromisoformat(str(body.get("to", body.get("from"))))
+    except ValueError:
+        return jsonify({"error": "'from' and 'to' must be dates in YYYY-MM-DD format"}), 400
+    if granularity not in ("hour", "day", "week", "month"):
+        return jsonify({"error": "'granularity' must be hour, day, week or month"}), 400
+    if end < start:
+        return jsonify({"error": "'to' must not be before 'from'"}), 400
+    max_days = RANGE_MAX_HOURLY_DAYS if granularity == "hour" else RANGE_MAX_DAYS
+    if (end - start).days + 1 > max_days:
+        return jsonify({"error": f"Range too long for granularity {granularity} (max {max_days} days)"}), 400
 
-        redis_model.add_entry(user_email, "production", day, hour, value)
-        return jsonify({"status": "saved", "day": day, "hour": str(hour)}), 200
+    try:
+        data = redis_model.get_range(user_email, start, end, granularity)
+        return jsonify({
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "granularity": granularity,
+            **data
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/register/bulk", methods=["POST"])
+def bulk_upload():
+    """Save many production/consumption readings for authenticated user at once.
+
+    The whole payload is validated first and then written in one Redis
+    transaction (see _parse_bulk_entries for the accepted formats).
+    """
+    user_email, err = get_user_from_cookie(request)
+    if err:
+        return err
+
+    try:
+        entries = _parse_bulk_entries(request)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        redis_model.add_entries(user_email, entries)
+        return jsonify({
+            "status": "saved",
+            "count": len(entries),
+            "days": len({day for _, day, _, _ in entries})
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -186,12 +922,56 @@ def set_consumption_day():
         value = body.get("value")
         if hour is None or value is None:
             return jsonify({"error": "Missing 'hour' or 'value' in payload"}), 400
-
-        redis_model.add_entry(user_email, "consumption", day, hour, value)
-        return jsonify({"status": "saved", "day": day, "hour": str(hour)}), 200
+        value = _parse_value(value)
+
+        previous = redis_model.add_entry(user_email, "consumption", day, hour, value)
+        return jsonify({
+            "status": "saved",
+            "day": day,
+            "hour": str(hour),
+            "replaced": previous is not None
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.cli.command("migrate-storage")
+def migrate_storage():
+    """Convert every user:{email} history blob into per-day hashes."""
+    migrated = 0
+    for key in redis_client.scan_iter(match="user:*", count=1000):
+        if key.count(":") != 1:
+            continue
+        if redis_model.migrate_user(key.split(":", 1)[1]):
+            migrated += 1
+    click.echo(f"Migrated {migrated} users")
+
+
+@app.cli.command("convert-storage")
+def convert_storage():
+    """Move every per-day hash into the binary format (REGISTER_STORAGE_FORMAT=binary)."""
+    if not isinstance(redis_model, BinaryRedisModel):
+        click.echo("Set REGISTER_STORAGE_FORMAT=binary to convert to the binary format")
+        return
+    converted = 0
+    for key in redis_client.scan_iter(match="user:*", count=1000):
+        if key.count(":") != 1:
+            continue
+        converted += redis_model.convert_day_hashes(key.split(":", 1)[1])
+    click.echo(f"Converted {converted} days")
+
+
+@app.cli.command("rebuild-rollups")
+def rebuild_rollups():
+    """Recompute the daily/monthly rollups of every user from the day hashes."""
+    # One scan of the keyspace for all users, rather than one per user
+    users = redis_model.scan_user_days()
+    for user_email, days in users.items():
+        redis_model.rebuild_rollups(user_email, days)
+    click.echo(f"Rebuilt rollups for {len(users)} users")
+
+
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5003, debug=True)
\ No newline at end of file
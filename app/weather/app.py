@@ -1,4 +1,6 @@
-import json
+# Must be imported first: applies gevent monkey patching when ASYNC_MODE=gevent
+from common.serving import serve
+
 import os
 import logging
 
@@ -13,23 +15,23 @@ import requests
 import requests_cache
 from retry_requests import retry
 
-from itsdangerous import URLSafeSerializer
-
 import redis
 
+from common.auth import get_user_profile
+from common.singleflight import SingleFlight
+
 app = Flask(__name__)
 
 logging.basicConfig(level=logging.DEBUG)
 
 WEATHER_API_API_KEY = os.getenv('WEATHER_API_API_KEY')
-SECRET_KEY = os.getenv("SECRET_KEY", "default_secret_key")
-
-serializer = URLSafeSerializer(SECRET_KEY, salt="user-cookie")
-
 REDIS_HOST = os.getenv("WEATHER_REDIS_HOST", os.getenv("REDIS_HOST", "weather_redis"))
 REDIS_PORT = int(os.getenv("WEATHER_REDIS_PORT", os.getenv("REDIS_PORT", 6379)))
 REDIS_DB = int(os.getenv("WEATHER_REDIS_DB", 0))
 CACHE_TTL_SECONDS = int(os.getenv("WEATHER_CACHE_TTL_SECONDS", 3600))
+CACHE_STALE_TTL_SECONDS = int(os.getenv("WEATHER_CACHE_STALE_TTL_SECONDS", 3 * 3600))
+CACHE_LOCK_TTL_SECONDS = int(os.getenv("WEATHER_CACHE_LOCK_TTL_SECONDS", 30))
+CACHE_WAIT_SECONDS = float(os.getenv("WEATHER_CACHE_WAIT_SECONDS", 15))
 
 try:
     redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
@@ -39,6 +41,14 @@ except Exception as e:
     logging.warning("Weather Redis unavailable (%s:%d db=%s): %s", REDIS_HOST, REDIS_PORT, REDIS_DB, e)
     redis_client = None
 
+# Only one Open-Meteo/WeatherAPI request per cache key at a time, across workers
+single_flight = SingleFlight(
+    redis_client,
+    stale_ttl=CACHE_STALE_TTL_SECONDS,
+    lock_ttl=CACHE_LOCK_TTL_SECONDS,
+    wait_timeout=CACHE_WAIT_SECONDS
+)
+
 def get_weather(
     latitude: float,
     longitude: float,
@@ -47,114 +57,82 @@ def get_weather(
     """Retrieves hourly weather data for a location using Open-Meteo API.
 
     Uses a Redis cache (one hour by default) keyed by lat/lon/timezone/date to
-    avoid repeated external API calls.
+    avoid repeated external API calls; concurrent misses share one API call.
     """
     # use date in key so forecasts for different days are cached separately
     today = datetime.utcnow().date().isoformat()
     cache_key = f"weather:{latitude}:{longitude}:{timezone}:{today}"
 
-    # try cache
-    if redis_client:
-        try:
-            cached = redis_client.get(cache_key)
-            if cached:
-                logging.debug("Weather cache hit for %s", cache_key)
-                cached_list = json.loads(cached)
-                df = pd.DataFrame(cached_list)
-                df["date"] = pd.to_datetime(df["date"])
-                df["weather_code"] = df["weather_code"].astype(str)
-                return df.head(24)
-        except Exception as e:
-            logging.warning("Weather Redis GET failed: %s", e)
-
-    # existing behaviour: fetch from Open-Meteo
-    cache_session = requests_cache.CachedSession(".cache", expire_after=CACHE_TTL_SECONDS)
-    retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-    openmeteo = openmeteo_requests.Client(session=retry_session)
-
-    params = {
-        "latitude": latitude,
-        "longitude": longitude,
-        "hourly": "weather_code",
-        "timezone": timezone,
-    }
-
-    responses = openmeteo.weather_api("https://api.open-meteo.com/v1/forecast",
-                                       params)
-    response = responses[0]
-    hourly = response.Hourly()
-
-    hourly_data = {
-        "date": pd.date_range(
-            start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-            end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
-            freq=pd.Timedelta(seconds=hourly.Interval()),
-            inclusive="left",
-        )
-    }
-
-    utc_offset = pd.to_timedelta(response.UtcOffsetSeconds(), unit="s")
-    hourly_data["date"] += utc_offset
-    hourly_data["weather_code"] = hourly.Variables(0).ValuesAsNumpy()
-
-    dataframe = pd.DataFrame(hourly_data).head(24)
-    dataframe["weather_code"] = dataframe["weather_code"].astype(int).astype(str)
-
-    # save to redis cache
-    if redis_client:
-        try:
-            serializable = dataframe.copy()
-            serializable["date"] = serializable["date"].dt.strftime("%Y-%m-%dT%H:%M:%S%z")
-            redis_client.set(cache_key, json.dumps(serializable.to_dict(orient="records")), ex=CACHE_TTL_SECONDS)
-            logging.debug("Cached weather under %s (ttl %ds)", cache_key, CACHE_TTL_SECONDS)
-        except Exception as e:
-            logging.warning("Weather Redis SET failed: %s", e)
-
-    return dataframe
+    def fetch():
+        cache_session = requests_cache.CachedSession(".cache", expire_after=CACHE_TTL_SECONDS)
+        retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
+        openmeteo = openmeteo_requests.Client(session=retry_session)
+
+        params = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "hourly": "weather_code",
+            "timezone": timezone,
+        }
+
+        responses = openmeteo.weather_api("https://api.open-meteo.com/v1/forecast",
+                                           params)
+        response = responses[0]
+        hourly = response.Hourly()
+
+        hourly_data = {
+            "date": pd.date_range(
+                start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
+                end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
+                freq=pd.Timedelta(seconds=hourly.Interval()),
+                inclusive="left",
+            )
+        }
+
+        utc_offset = pd.to_timedelta(response.UtcOffsetSeconds(), unit="s")
+        hourly_data["date"] += utc_offset
+        hourly_data["weather_code"] = hourly.Variables(0).ValuesAsNumpy()
+
+        dataframe = pd.DataFrame(hourly_data).head(24)
+        dataframe["weather_code"] = dataframe["weather_code"].astype(int).astype(str)
+        dataframe["date"] = dataframe["date"].dt.strftime("%Y-%m-%dT%H:%M:%S%z")
+        return dataframe.to_dict(orient="records")
+
+    records = single_flight.get(cache_key, CACHE_TTL_SECONDS, fetch)
+    if records is None:
+        raise RuntimeError("Weather forecast unavailable")
+    df = pd.DataFrame(records)
+    df["date"] = pd.to_datetime(df["date"])
+    df["weather_code"] = df["weather_code"].astype(str)
+    return df.head(24)
 
 def get_sunrise_sunset(latitude: float, longitude: float) -> Tuple[str, str]:
     """Retrieves sunrise and sunset times for a location using WeatherAPI.
 
-    Uses Redis cache (same TTL as weather) keyed by lat/lon/date to avoid extra API calls.
+    Uses Redis cache (same TTL as weather) keyed by lat/lon/date to avoid extra
+    API calls; concurrent misses share one API call.
     """
     today = datetime.utcnow().date().isoformat()
     cache_key = f"sun:{latitude}:{longitude}:{today}"
 
-    # Try cache
-    if redis_client:
-        try:
-            cached = redis_client.get(cache_key)
-            if cached:
-                logging.debug("Sunrise/sunset cache hit for %s", cache_key)
-                obj = json.loads(cached)
-                return obj.get("sunrise"), obj.get("sunset")
-        except Exception as e:
-            logging.warning("Weather Redis GET failed for sunrise/sunset: %s", e)
-
-    url = "http://api.weatherapi.com/v1/astronomy.json"
-    params = {
-        "key": WEATHER_API_API_KEY,
-        "q": f"{latitude},{longitude}",
-        "aqi": "no",
-    }
-
-    response = requests.get(url, params=params, timeout=10)
-    response.raise_for_status()
-
-    data = response.json()
-    astronomy = data["astronomy"]["astro"]
-    sunrise = astronomy["sunrise"]
-    sunset = astronomy["sunset"]
-
-    # Save to cache
-    if redis_client:
-        try:
-            redis_client.set(cache_key, json.dumps({"sunrise": sunrise, "sunset": sunset}), ex=CACHE_TTL_SECONDS)
-            logging.debug("Cached sunrise/sunset under %s (ttl %ds)", cache_key, CACHE_TTL_SECONDS)
-        except Exception as e:
-            logging.warning("Weather Redis SET failed for sunrise/sunset: %s", e)
-
-    return sunrise, sunset
+    def fetch():
+        url = "http://api.weatherapi.com/v1/astronomy.json"
+        params = {
+            "key": WEATHER_API_API_KEY,
+            "q": f"{latitude},{longitude}",
+            "aqi": "no",
+        }
+
+        response = requests.get(url, params=params, timeout=10)
+        response.raise_for_status()
+
+        astronomy = response.json()["astronomy"]["astro"]
+        return {"sunrise": astronomy["sunrise"], "sunset": astronomy["sunset"]}
+
+    times = single_flight.get(cache_key, CACHE_TTL_SECONDS, fetch)
+    if times is None:
+        raise RuntimeError("Sunrise and sunset times unavailable")
+    return times["sunrise"], times["sunset"]
 
 def image_array(
     codes: pd.DataFrame,
@@ -205,21 +183,24 @@ def weather():
         - 400 for invalid parameters
         - 500 for data retrieval failures
     """
-    # Get and validate cookie
-    cookie = request.cookies.get("user_data")
-    if not cookie:
+    # Get and validate cookie (verified once per cookie, see common.auth)
+    try:
+        profile = get_user_profile(request)
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 401
+    if profile is None:
         return jsonify({
             'error': 'Authentication required'
         }), 401
 
     try:
-        # Deserialize cookie data using the same serializer as user_ms
-        data = serializer.loads(cookie)
-        
-        # Get required fields from cookie data
-        latitude = float(data['latitude'])
-        longitude = float(data['longitude']) 
-        timezone = data['time_zone']
+        latitude = profile.latitude
+        longitude = profile.longitude
+        timezone = profile.time_zone
+        if latitude is None or longitude is None or not timezone:
+            raise ValueError("missing location in cookie")
 
         logging.info("Processing weather request for coordinates: %f,%f", latitude, longitude)
 
@@ -249,4 +230,4 @@ def weather():
     
     
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5002)
\ No newline at end of file
+    serve(app, port=5002)
\ No newline at end of file
@@ -0,0 +1,93 @@
+import requests
+import os
+import json
+from datetime import datetime, timedelta, timezone
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+COOKIE_FILE = os.path.join(SCRIPT_DIR, "cookies.txt")
+BASE_URL = "https://sirienergy.uab.cat"
+VERIFY_SSL = False
+
+def load_cookie():
+    """Load cookie from file."""
+    if os.path.exists(COOKIE_FILE):
+        with open(COOKIE_FILE, "r") as f:
+            return f.read().strip()
+    print("❌ No cookie file found. Run test_register.py first.")
+    return None
+
+def test_battery_simulation():
+    """Simulate the user's battery over the last week, with and without arbitrage."""
+    cookie = load_cookie()
+    if not cookie:
+        return
+
+    session = requests.Session()
+    session.cookies.set("user_data", cookie)
+
+    today = datetime.now(timezone.utc).date()
+    period = {
+        "from": (today - timedelta(days=7)).isoformat(),
+        "to": (today - timedelta(days=1)).isoformat(),
+    }
+
+    print("=== Testing Battery Simulation Endpoint ===\n")
+
+    for arbitrage in (False, True):
+        try:
+            r = session.post(
+                f"{BASE_URL}/processing/battery",
+                json={**period, "arbitrage": arbitrage},
+                verify=VERIFY_SSL,
+                timeout=60
+            )
+            print(f"Status (arbitrage={arbitrage}): {r.status_code}")
+
+            if r.status_code == 200:
+                response_data = r.json()
+                soc = response_data.get("soc", [])
+                print(f"Capacity: {response_data.get('capacity')} kWh  Freq: {response_data.get('freq')}")
+                print(f"Slots: {len(soc)}  Final SoC: {soc[-1] if soc else None} kWh")
+                for name, value in response_data.get("totals", {}).items():
+                    print(f"  {name:<24} {value}")
+            else:
+                print(f"Error Response: {json.dumps(r.json(), indent=2)}")
+
+        except requests.exceptions.Timeout:
+            print("❌ Request timeout - service may be slow or unreachable")
+        except requests.exceptions.ConnectionError as e:
+            print(f"❌ Connection error: {e}")
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+        print()
+
+    # Two sites of a community, one day of 15 min steps
+    print("=== Testing Battery Batch Endpoint ===\n")
+    surplus = [[2000.0 if 40 <= i < 64 else -500.0 for i in range(96)]] * 2
+    try:
+        r = session.post(
+            f"{BASE_URL}/processing/battery/batch",
+            json={"unit": "W", "sites": [
+                {"surplus": surplus[0], "battery_energy_capacity": 5},
+                {"surplus": surplus[1], "battery_energy_capacity": 10},
+            ]},
+            verify=VERIFY_SSL,
+            timeout=60
+        )
+        print(f"Status: {r.status_code}")
+        if r.status_code == 200:
+            response_data = r.json()
+            for i, row in enumerate(response_data.get("soc", [])):
+                print(f"  Site {i}: max SoC {max(row)} kWh, final SoC {row[-1]} kWh")
+            print("\n✅ Battery batch simulated")
+        else:
+            print(f"Error Response: {json.dumps(r.json(), indent=2)}")
+    except requests.exceptions.ConnectionError as e:
+        print(f"❌ Connection error: {e}")
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+
+    print("\n✅ Battery simulation test completed")
+
+if __name__ == "__main__":
+    test_battery_simulation()
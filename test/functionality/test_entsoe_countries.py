@@ -0,0 +1,24 @@
+import requests
+
+BASE_URL = "https://sirienergy.uab.cat"
+VERIFY_SSL = True
+
+def test_entsoe_countries():
+    """List the countries with ENTSO-E day-ahead prices (no cookie needed)."""
+    try:
+        r = requests.get(f"{BASE_URL}/entsoe/countries", verify=VERIFY_SSL, timeout=10)
+        print(f"Status: {r.status_code}")
+        if r.status_code == 200:
+            countries = r.json().get("countries", [])
+            for country in countries:
+                print(f"  {country['iso']}  {country['name']:<12} {country['key']}")
+            print(f"\n✅ {len(countries)} countries listed")
+        else:
+            print(f"⚠️ Unexpected status code: {r.status_code}")
+    except requests.exceptions.ConnectionError as error:
+        print("❌ Connection failed. Error:", error)
+    except Exception as error:
+        print("❌ An unexpected error occurred:", error)
+
+if __name__ == "__main__":
+    test_entsoe_countries()
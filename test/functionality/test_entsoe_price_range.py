@@ -0,0 +1,72 @@
+import requests
+import os
+import json
+from datetime import date, timedelta
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+COOKIE_FILE = os.path.join(SCRIPT_DIR, "cookies.txt")
+BASE_URL = "https://sirienergy.uab.cat"
+VERIFY_SSL = True
+
+def load_cookie():
+    """Load cookie from file."""
+    if os.path.exists(COOKIE_FILE):
+        with open(COOKIE_FILE, "r") as f:
+            return f.read().strip()
+    print("❌ No cookie file found. Run test_register.py first.")
+    return None
+
+def test_entsoe_price_range():
+    """Read a week of stored day-ahead prices for two countries."""
+    cookie = load_cookie()
+    if not cookie:
+        return
+
+    session = requests.Session()
+    session.cookies.set("user_data", cookie)
+
+    today = date.today()
+    params = {
+        "from": (today - timedelta(days=7)).isoformat(),
+        "to": (today - timedelta(days=1)).isoformat(),
+        "countries": "ES,France",
+    }
+
+    print("=== Testing ENTSO-E Price Range Endpoint ===\n")
+
+    try:
+        r = session.get(f"{BASE_URL}/entsoe/prices", params=params, verify=VERIFY_SSL, timeout=30)
+        print(f"Status: {r.status_code}")
+
+        if r.status_code == 200:
+            response_data = r.json()
+            print(f"Range: {response_data.get('from')} .. {response_data.get('to')}")
+            print(f"Start: {response_data.get('start')}  Resolution: {response_data.get('resolution')}")
+            for country, prices in response_data.get("prices", {}).items():
+                known = [p for p in prices if p is not None]
+                print(f"  {country:<12} {len(prices)} slots, {len(known)} with a price")
+                if len(prices) != 7 * 96:
+                    print(f"❌ Expected {7 * 96} slots for {country}")
+            print("\n✅ ENTSO-E price range test completed")
+        else:
+            print(f"Error Response: {json.dumps(r.json(), indent=2)}")
+
+        # An inverted range must be rejected
+        r = session.get(
+            f"{BASE_URL}/entsoe/prices",
+            params={"from": params["to"], "to": params["from"]},
+            verify=VERIFY_SSL,
+            timeout=30,
+        )
+        if r.status_code == 400:
+            print("✅ Inverted range rejected")
+        else:
+            print(f"❌ Inverted range returned {r.status_code}")
+
+    except requests.exceptions.ConnectionError as e:
+        print(f"❌ Connection error: {e}")
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+
+if __name__ == "__main__":
+    test_entsoe_price_range()
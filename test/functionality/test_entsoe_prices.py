@@ -26,37 +26,38 @@ def test_entsoe_prices():
 
     print("=== Testing ENTSO-E Prices Endpoint ===\n")
 
-    # Retrieve ENTSO-E prices
-    try:
-        r = session.get(
-            f"{BASE_URL}/entsoe/prices",
-            verify=VERIFY_SSL,
-            timeout=30
-        )
-        print(f"Status: {r.status_code}")
-        
-        if r.status_code == 200:
-            response_data = r.json()
-            print(f"\nUser: {response_data.get('user')}")
-            print(f"Country: {response_data.get('country')}")
-            print(f"\nPrice Data (first 5 points):")
-            
-            data = response_data.get('data', [])
-            if isinstance(data, list):
-                for i, point in enumerate(data[:5]):
-                    print(f"  Point {i+1}: {json.dumps(point, indent=4)}")
-                print(f"\nTotal data points retrieved: {len(data)}")
+    # Retrieve ENTSO-E prices, quarter-hourly and averaged per hour
+    for resolution, slots in (("PT15M", 96), ("PT60M", 24)):
+        try:
+            r = session.get(
+                f"{BASE_URL}/entsoe/prices",
+                params={"resolution": resolution},
+                verify=VERIFY_SSL,
+                timeout=30
+            )
+            print(f"Status ({resolution}): {r.status_code}")
+
+            if r.status_code == 200:
+                response_data = r.json()
+                print(f"\nUser: {response_data.get('user')}")
+                print(f"Country: {response_data.get('country')}")
+                print(f"Start: {response_data.get('start')}  Resolution: {response_data.get('resolution')}")
+
+                prices = response_data.get('prices', [])
+                print(f"Prices (first 5): {prices[:5]}")
+                print(f"Total prices retrieved: {len(prices)}")
+                if len(prices) != slots:
+                    print(f"❌ Expected {slots} prices at {resolution}")
             else:
-                print(json.dumps(data, indent=2))
-        else:
-            print(f"Error Response: {json.dumps(r.json(), indent=2)}")
+                print(f"Error Response: {json.dumps(r.json(), indent=2)}")
 
-    except requests.exceptions.Timeout:
-        print("❌ Request timeout - ENTSO-E API may be slow or unreachable")
-    except requests.exceptions.ConnectionError as e:
-        print(f"❌ Connection error: {e}")
-    except Exception as e:
-        print(f"❌ ERROR: {e}")
+        except requests.exceptions.Timeout:
+            print("❌ Request timeout - ENTSO-E API may be slow or unreachable")
+        except requests.exceptions.ConnectionError as e:
+            print(f"❌ Connection error: {e}")
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+        print()
 
     print("\n✅ ENTSO-E prices test completed")
 
@@ -70,5 +70,57 @@ def test_pvlib_generation():
 
     print("\n✅ PVLib generation test completed")
 
+def test_pvlib_generation_range():
+    """Stream a month of hourly PV generation data as NDJSON."""
+    cookie = load_cookie()
+    if not cookie:
+        return
+
+    session = requests.Session()
+    session.cookies.set("user_data", cookie)
+
+    params = {
+        "start": "2024-06-01",
+        "end": "2024-06-30",
+        "freq": "1h",
+        "format": "ndjson",
+    }
+
+    print("=== Testing PVLib Generation Range Endpoint ===\n")
+
+    try:
+        r = session.get(
+            f"{BASE_URL}/processing/pvlibGen",
+            params=params,
+            verify=VERIFY_SSL,
+            stream=True,
+            timeout=60
+        )
+        print(f"Status: {r.status_code}")
+
+        if r.status_code == 200:
+            total_points = 0
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                power_array = chunk.get("power", [])
+                total_points += len(power_array)
+                print(f"Chunk from {chunk.get('start')}: {len(power_array)} points, "
+                      f"max {max(power_array):.2f} W")
+            print(f"\nTotal data points: {total_points}")
+        else:
+            print(f"Error Response: {json.dumps(r.json(), indent=2)}")
+
+    except requests.exceptions.Timeout:
+        print("❌ Request timeout - service may be slow or unreachable")
+    except requests.exceptions.ConnectionError as e:
+        print(f"❌ Connection error: {e}")
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+
+    print("\n✅ PVLib generation range test completed")
+
 if __name__ == "__main__":
-    test_pvlib_generation()
\ No newline at end of file
+    test_pvlib_generation()
+    test_pvlib_generation_range()
\ No newline at end of file
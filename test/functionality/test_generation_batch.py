@@ -0,0 +1,85 @@
+import requests
+import os
+import json
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+COOKIE_FILE = os.path.join(SCRIPT_DIR, "cookies.txt")
+BASE_URL = "https://sirienergy.uab.cat"
+VERIFY_SSL = True
+
+def load_cookie():
+    """Load cookie from file."""
+    if os.path.exists(COOKIE_FILE):
+        with open(COOKIE_FILE, "r") as f:
+            return f.read().strip()
+    print("❌ No cookie file found. Run test_register.py first.")
+    return None
+
+def test_pvlib_generation_batch():
+    """Retrieve PV generation data for several sites in one request."""
+    cookie = load_cookie()
+    if not cookie:
+        return
+
+    session = requests.Session()
+    session.cookies.set("user_data", cookie)
+
+    # Test sites: a small community around Barcelona plus one in Berlin
+    sites = [
+        {
+            "latitude": 41.50 + i * 0.01,
+            "longitude": 2.10,
+            "altitude": 100,
+            "surface": 10 + i,
+            "efficiency": 18,
+            "time_zone": "Europe/Madrid",
+        }
+        for i in range(5)
+    ]
+    sites.append({
+        "latitude": 52.52,
+        "longitude": 13.40,
+        "altitude": 40,
+        "surface": 12,
+        "efficiency": 20,
+        "time_zone": "Europe/Berlin",
+    })
+
+    print("=== Testing PVLib Batch Generation Endpoint ===\n")
+
+    try:
+        r = session.post(
+            f"{BASE_URL}/processing/pvlibGen/batch",
+            json={"sites": sites},
+            verify=VERIFY_SSL,
+            timeout=30
+        )
+        print(f"Status: {r.status_code}")
+
+        if r.status_code == 200:
+            response_data = r.json()
+            power_matrix = response_data.get("power", [])
+
+            print(f"\nDay: {response_data.get('day')}")
+            print(f"Frequency: {response_data.get('freq')}")
+            print(f"Sites: {response_data.get('count')}\n")
+
+            print("Site | Max power (W) | Daily energy (kWh)")
+            print("-" * 45)
+            for i, power_array in enumerate(power_matrix):
+                energy = sum(power_array) * 0.25 / 1000
+                print(f"{i:>4} | {max(power_array):>13.2f} | {energy:>18.2f}")
+        else:
+            print(f"Error Response: {json.dumps(r.json(), indent=2)}")
+
+    except requests.exceptions.Timeout:
+        print("❌ Request timeout - service may be slow or unreachable")
+    except requests.exceptions.ConnectionError as e:
+        print(f"❌ Connection error: {e}")
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+
+    print("\n✅ PVLib batch generation test completed")
+
+if __name__ == "__main__":
+    test_pvlib_generation_batch()
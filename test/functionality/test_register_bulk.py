@@ -0,0 +1,68 @@
+import requests
+import os
+from datetime import datetime, timezone
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+COOKIE_FILE = os.path.join(SCRIPT_DIR, "cookies.txt")
+BASE_URL = "https://sirienergy.uab.cat"
+VERIFY_SSL = True
+
+def load_cookie():
+    """Load cookie from file."""
+    if os.path.exists(COOKIE_FILE):
+        with open(COOKIE_FILE, "r") as f:
+            return f.read().strip()
+    print("❌ No cookie file found. Run test_register.py first.")
+    return None
+
+def test_bulk_upload():
+    """Send a full day of production and consumption data in one request."""
+    cookie = load_cookie()
+    if not cookie:
+        return
+
+    session = requests.Session()
+    session.cookies.set("user_data", cookie)
+
+    today = datetime.now(timezone.utc).date().isoformat()
+
+    print(f"Testing bulk endpoint for {today}...\n")
+
+    # JSON payload: 24 hours x 2 fields
+    print("=== Saving JSON Payload ===")
+    payload = {
+        "day": today,
+        "production": [{"hour": str(h), "value": round(0.1 * h, 2)} for h in range(24)],
+        "consumption": [{"hour": str(h), "value": 0.5} for h in range(24)],
+    }
+    try:
+        r = session.post(
+            f"{BASE_URL}/register/bulk",
+            json=payload,
+            verify=VERIFY_SSL,
+            timeout=10
+        )
+        print(f"{r.status_code} - {r.text}")
+    except Exception as e:
+        print(f"ERROR - {e}")
+
+    # CSV payload
+    print("\n=== Saving CSV Payload ===")
+    rows = ["field,day,hour,value"]
+    rows += [f"production,{today},{h},{0.2 * h:.2f}" for h in range(24)]
+    try:
+        r = session.post(
+            f"{BASE_URL}/register/bulk",
+            data="\n".join(rows),
+            headers={"Content-Type": "text/csv"},
+            verify=VERIFY_SSL,
+            timeout=10
+        )
+        print(f"{r.status_code} - {r.text}")
+    except Exception as e:
+        print(f"ERROR - {e}")
+
+    print("\n✅ Bulk upload test completed")
+
+if __name__ == "__main__":
+    test_bulk_upload()
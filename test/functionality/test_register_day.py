@@ -0,0 +1,69 @@
+import requests
+import os
+import json
+from datetime import datetime, timedelta, timezone
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+COOKIE_FILE = os.path.join(SCRIPT_DIR, "cookies.txt")
+BASE_URL = "https://sirienergy.uab.cat"
+VERIFY_SSL = True
+
+def load_cookie():
+    """Load cookie from file."""
+    if os.path.exists(COOKIE_FILE):
+        with open(COOKIE_FILE, "r") as f:
+            return f.read().strip()
+    print("❌ No cookie file found. Run test_register.py first.")
+    return None
+
+def test_retrieve_day():
+    """Retrieve production and consumption together for one and several days."""
+    cookie = load_cookie()
+    if not cookie:
+        return
+
+    session = requests.Session()
+    session.cookies.set("user_data", cookie)
+
+    today = datetime.now(timezone.utc).date()
+    yesterday = today - timedelta(days=1)
+
+    print(f"Testing combined day endpoint for {today.isoformat()}...\n")
+
+    # Single day
+    print("=== Retrieving Single Day ===")
+    try:
+        r = session.post(
+            f"{BASE_URL}/register/get_day",
+            json={"day": today.isoformat()},
+            verify=VERIFY_SSL,
+            timeout=10
+        )
+        print(f"Status: {r.status_code}")
+        print(f"Response: {json.dumps(r.json(), indent=2)}\n")
+    except Exception as e:
+        print(f"ERROR: {e}\n")
+
+    # Several days
+    print("=== Retrieving Several Days ===")
+    try:
+        r = session.post(
+            f"{BASE_URL}/register/get_day",
+            json={"days": [yesterday.isoformat(), today.isoformat()]},
+            verify=VERIFY_SSL,
+            timeout=10
+        )
+        print(f"Status: {r.status_code}")
+        if r.status_code == 200:
+            for entry in r.json().get("days", []):
+                print(f"{entry['day']}: {len(entry['production'])} production, "
+                      f"{len(entry['consumption'])} consumption entries")
+        else:
+            print(f"Error Response: {json.dumps(r.json(), indent=2)}")
+    except Exception as e:
+        print(f"ERROR: {e}\n")
+
+    print("\n✅ Combined day retrieve test completed")
+
+if __name__ == "__main__":
+    test_retrieve_day()
@@ -0,0 +1,64 @@
+import requests
+import os
+import json
+from datetime import datetime, timedelta, timezone
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+COOKIE_FILE = os.path.join(SCRIPT_DIR, "cookies.txt")
+BASE_URL = "https://sirienergy.uab.cat"
+VERIFY_SSL = True
+
+def load_cookie():
+    """Load cookie from file."""
+    if os.path.exists(COOKIE_FILE):
+        with open(COOKIE_FILE, "r") as f:
+            return f.read().strip()
+    print("❌ No cookie file found. Run test_register.py first.")
+    return None
+
+def test_retrieve_range():
+    """Retrieve aggregated production and consumption for several granularities."""
+    cookie = load_cookie()
+    if not cookie:
+        return
+
+    session = requests.Session()
+    session.cookies.set("user_data", cookie)
+
+    today = datetime.now(timezone.utc).date()
+
+    queries = [
+        ("hour", today, today),
+        ("day", today - timedelta(days=6), today),
+        ("week", today - timedelta(days=27), today),
+        ("month", today.replace(month=1, day=1), today),
+    ]
+
+    for granularity, start, end in queries:
+        print(f"=== Range {start.isoformat()} -> {end.isoformat()} by {granularity} ===")
+        try:
+            r = session.post(
+                f"{BASE_URL}/register/range",
+                json={"from": start.isoformat(), "to": end.isoformat(), "granularity": granularity},
+                verify=VERIFY_SSL,
+                timeout=10
+            )
+            print(f"Status: {r.status_code}")
+            if r.status_code == 200:
+                data = r.json()
+                print("Label         | Production | Consumption")
+                print("-" * 42)
+                for label, prod, cons in zip(data["labels"], data["production"], data["consumption"]):
+                    prod = 0 if prod is None else prod
+                    cons = 0 if cons is None else cons
+                    print(f"{label:<13} | {prod:>10.2f} | {cons:>11.2f}")
+            else:
+                print(f"Error Response: {json.dumps(r.json(), indent=2)}")
+        except Exception as e:
+            print(f"ERROR: {e}")
+        print()
+
+    print("✅ Range retrieve test completed")
+
+if __name__ == "__main__":
+    test_retrieve_range()
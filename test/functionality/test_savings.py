@@ -0,0 +1,81 @@
+import requests
+import os
+import json
+from datetime import datetime, timedelta, timezone
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+COOKIE_FILE = os.path.join(SCRIPT_DIR, "cookies.txt")
+BASE_URL = "https://sirienergy.uab.cat"
+VERIFY_SSL = False
+
+def load_cookie():
+    """Load cookie from file."""
+    if os.path.exists(COOKIE_FILE):
+        with open(COOKIE_FILE, "r") as f:
+            return f.read().strip()
+    print("❌ No cookie file found. Run test_register.py first.")
+    return None
+
+def test_savings_calculation():
+    """Value the last 30 days of surplus against day-ahead prices and the user's tariff."""
+    cookie = load_cookie()
+    if not cookie:
+        return
+
+    session = requests.Session()
+    session.cookies.set("user_data", cookie)
+
+    today = datetime.now(timezone.utc).date()
+    payload = {
+        "from": (today - timedelta(days=30)).isoformat(),
+        "to": (today - timedelta(days=1)).isoformat(),
+    }
+
+    print("=== Testing Savings Calculation Endpoint ===\n")
+
+    try:
+        print(f"Requesting savings from {payload['from']} to {payload['to']}\n")
+
+        r = session.post(
+            f"{BASE_URL}/processing/savings",
+            json=payload,
+            verify=VERIFY_SSL,
+            timeout=60
+        )
+        print(f"Status: {r.status_code}")
+
+        if r.status_code == 200:
+            response_data = r.json()
+            print(f"Timezone: {response_data.get('timezone')}  Freq: {response_data.get('freq')}")
+            print(f"Fee type: {response_data.get('fee_type')}")
+            print(f"Slots: {len(response_data.get('surplus', []))}")
+
+            print("\n=== Totals ===")
+            for name, value in response_data.get("totals", {}).items():
+                print(f"  {name:<16} {value}")
+        else:
+            print(f"Error Response: {json.dumps(r.json(), indent=2)}")
+
+        # An inverted range must be rejected
+        r = session.post(
+            f"{BASE_URL}/processing/savings",
+            json={"from": payload["to"], "to": payload["from"]},
+            verify=VERIFY_SSL,
+            timeout=30
+        )
+        if r.status_code == 400:
+            print("\n✅ Inverted range rejected")
+        else:
+            print(f"\n❌ Inverted range returned {r.status_code}")
+
+    except requests.exceptions.Timeout:
+        print("❌ Request timeout - service may be slow or unreachable")
+    except requests.exceptions.ConnectionError as e:
+        print(f"❌ Connection error: {e}")
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+
+    print("\n✅ Savings calculation test completed")
+
+if __name__ == "__main__":
+    test_savings_calculation()
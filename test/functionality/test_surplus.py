@@ -91,5 +91,54 @@ def test_surplus_calculation():
 
     print("\n✅ Surplus calculation test completed")
 
+def _minute_of_day(label):
+    """Minutes since midnight of an hour label ('7' or '07:45')."""
+    hours, _, minutes = str(label).partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+def test_surplus_quarter_hours():
+    """Surplus over quarter-hour ('HH:MM') slots, when register stores 96 slots per day."""
+    cookie = load_cookie()
+    if not cookie:
+        return
+
+    session = requests.Session()
+    session.cookies.set("user_data", cookie)
+
+    day = "2000-01-01"
+
+    print("\n=== Testing Surplus Calculation with 15 min slots ===\n")
+
+    try:
+        for field, hour, value in (("production", "23:15", 0.75), ("production", "07:45", 0.5), ("consumption", "12:30", 0.25)):
+            r = session.post(
+                f"{BASE_URL}/register/set_{field}_day",
+                json={"day": day, "hour": hour, "value": value},
+                verify=VERIFY_SSL,
+                timeout=10
+            )
+            if r.status_code == 400:
+                print(f"⚠️ Register does not store 15 min slots, skipping ({r.json().get('error')})")
+                return
+            print(f"Saved {field} {hour}: {r.status_code}")
+
+        r = session.post(f"{BASE_URL}/processing/surplus", json={"day": day}, verify=VERIFY_SSL, timeout=30)
+        print(f"Status: {r.status_code}")
+        if r.status_code == 200:
+            hours = [item["hour"] for item in r.json().get("surplus", [])]
+            print(f"Slots: {hours}")
+            if hours == sorted(hours, key=_minute_of_day):
+                print("✅ Quarter-hour slots sorted by time of day")
+            else:
+                print("❌ Quarter-hour slots out of order")
+        else:
+            print(f"❌ Surplus failed: {r.text}")
+
+    except requests.exceptions.ConnectionError as e:
+        print(f"❌ Connection error: {e}")
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+
 if __name__ == "__main__":
-    test_surplus_calculation()
\ No newline at end of file
+    test_surplus_calculation()
+    test_surplus_quarter_hours()
\ No newline at end of file
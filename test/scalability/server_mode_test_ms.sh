@@ -0,0 +1,76 @@
+#!/bin/bash
+
+# Compares the development server and the gunicorn production entry points.
+# Start the stack in one mode, run this script with that mode's name, then
+# repeat with the other one:
+#   docker compose -f docker-compose.yml -f docker-compose.dev.yml up -d   ->  ./server_mode_test_ms.sh dev
+#   docker compose up -d                                                   ->  ./server_mode_test_ms.sh prod
+
+BASE_URL="https://sirienergy.uab.cat"
+COOKIE_FILE="cookies.txt"
+MODE="$1"
+CONCURRENCY_LEVELS=(10 50 100)
+REQUESTS_PER_CLIENT=100
+
+if [[ "$MODE" != "dev" && "$MODE" != "prod" ]]; then
+  echo "Usage: $0 dev|prod"
+  exit 1
+fi
+
+if [[ ! -f "$COOKIE_FILE" ]]; then
+  echo "❌ Cookie file not found: $COOKIE_FILE"
+  exit 1
+fi
+
+COOKIE_VALUE=$(cat "$COOKIE_FILE")
+COOKIE_HEADER="user_data=${COOKIE_VALUE}"
+
+mkdir -p results_server_mode
+
+# Format: "METHOD URL JSON_FILE"
+tests=(
+  "GET $BASE_URL/processing/pvlibGen -"
+  "GET $BASE_URL/weather -"
+  "POST $BASE_URL/processing/surplus jsons/data_surplus.json"
+)
+
+# Initialize CSV (only add header if file doesn't exist)
+CSV_FILE="results_server_mode/benchmark_results.csv"
+if [[ ! -f "$CSV_FILE" ]]; then
+  echo "Mode,Requests,Concurrency,Test,Requests per second,Time per request (ms),Failed requests" > "$CSV_FILE"
+fi
+
+for CONCURRENCY in "${CONCURRENCY_LEVELS[@]}"; do
+  REQUESTS=$((CONCURRENCY * REQUESTS_PER_CLIENT))
+
+  for test in "${tests[@]}"; do
+    read method url json <<< "$test"
+    name=$(basename "$url")
+    mkdir -p "results_server_mode/result_${name}"
+    result_file="results_server_mode/result_${name}/result_${MODE}_n${REQUESTS}_c${CONCURRENCY}_${name}.txt"
+
+    echo "🚀 [$MODE] $method $url (n=$REQUESTS, c=$CONCURRENCY)"
+
+    if [[ "$method" == "POST" ]]; then
+      ab -k -n "$REQUESTS" -c "$CONCURRENCY" \
+        -p "$json" \
+        -T application/json \
+        -C "$COOKIE_HEADER" \
+        "$url" > "$result_file"
+    else
+      ab -k -n "$REQUESTS" -c "$CONCURRENCY" \
+        -C "$COOKIE_HEADER" \
+        "$url" > "$result_file"
+    fi
+
+    rps=$(grep "Requests per second:" "$result_file" | awk '{print $4}')
+    time_value=$(grep "Time per request:" "$result_file" | head -1 | awk '{print $4}')
+    failed=$(grep "Failed requests:" "$result_file" | awk '{print $3}')
+    echo "  ✓ $name: ${rps} req/s, ${time_value} ms, ${failed} failed"
+
+    echo "$MODE,$REQUESTS,$CONCURRENCY,$name,$rps,$time_value,$failed" >> "$CSV_FILE"
+  done
+done
+
+echo "🏁 All $MODE tests completed"
+echo "📊 Results appended to $CSV_FILE"
@@ -0,0 +1,30 @@
+import os
+import sys
+import importlib.util
+from datetime import datetime
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+os.environ.setdefault("ENTSOE_REFRESH_ENABLED", "false")
+os.environ.setdefault("REDIS_HOST", "localhost")
+sys.path.insert(0, os.path.join(REPO_DIR, "app"))
+
+spec = importlib.util.spec_from_file_location("entsoe_app", os.path.join(REPO_DIR, "app", "entsoe", "app.py"))
+entsoe = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(entsoe)
+
+def test_price_window():
+    """The midnight refresh asks for today's prices, the afternoon one also for tomorrow's."""
+    cases = {
+        "00:05": (datetime(2024, 6, 21, 0, 5), ("202406202200", "202406212200")),
+        "13:30": (datetime(2024, 6, 21, 13, 30), ("202406202200", "202406222200")),
+    }
+    for slot, (now, expected) in cases.items():
+        window = entsoe.price_window(now)
+        if window == expected:
+            print(f"✅ {slot} refresh window {window}")
+        else:
+            print(f"❌ {slot} refresh window {window}, expected {expected}")
+        assert window == expected
+
+if __name__ == "__main__":
+    test_price_window()